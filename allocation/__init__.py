@@ -0,0 +1,54 @@
+"""Pure allocation engine behind the Streamlit tool.
+
+Names are re-exported lazily so ``import allocation`` stays cheap; pandas and
+numpy are only imported when an engine function is first touched.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "FACILITIES": "allocation.schema",
+    "AllocationResult": "allocation.engine",
+    "EligibilityBitmap": "allocation.eligibility",
+    "ThresholdIndex": "allocation.eligibility",
+    "allocate": "allocation.engine",
+    "allocate_incremental": "allocation.incremental",
+    "clean_deals": "allocation.cleaning",
+    "clean_vehicles": "allocation.cleaning",
+    "compute_availability": "allocation.cleaning",
+    "default_deals": "allocation.defaults",
+    "default_vehicles": "allocation.defaults",
+    "eligibility_masks": "allocation.eligibility",
+    "fmt_dollars": "allocation.formatting",
+    "fmt_percent": "allocation.formatting",
+}
+
+__all__ = sorted(_EXPORTS)
+
+if TYPE_CHECKING:
+    from allocation.cleaning import clean_deals, clean_vehicles, compute_availability
+    from allocation.defaults import default_deals, default_vehicles
+    from allocation.eligibility import (
+        EligibilityBitmap,
+        ThresholdIndex,
+        eligibility_masks,
+    )
+    from allocation.engine import AllocationResult, allocate
+    from allocation.formatting import fmt_dollars, fmt_percent
+    from allocation.incremental import allocate_incremental
+    from allocation.schema import FACILITIES
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module 'allocation' has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
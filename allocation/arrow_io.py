@@ -0,0 +1,115 @@
+"""Parquet / Arrow IPC / CSV readers and writers for books and results.
+
+Readers project onto the columns clean_deals / clean_vehicles use, so
+extra upstream columns are never read. Arrow IPC files are written
+uncompressed and memory-mapped on read, which lets numeric columns without
+nulls reach pandas without a copy. pyarrow is only needed for the Parquet
+and Arrow formats.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from allocation.schema import (
+    DEAL_NUM_COLS,
+    DEAL_TEXT_COLS,
+    VEHICLE_NUM_COLS,
+    VEHICLE_TEXT_COLS,
+    VEHICLE_TOGGLE_COLS,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+DEAL_COLUMNS = DEAL_TEXT_COLS + DEAL_NUM_COLS
+VEHICLE_COLUMNS = VEHICLE_TEXT_COLS + VEHICLE_NUM_COLS + VEHICLE_TOGGLE_COLS
+
+
+def file_format(source, fmt: str | None = None) -> str:
+    # "parquet", "arrow" or "csv", from ``fmt`` or the file name's suffix
+    if fmt is not None:
+        return fmt
+    suffix = Path(str(getattr(source, "name", source))).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+
+def _require_pyarrow(fmt: str) -> None:
+    if pa is None:
+        raise ImportError(f"reading or writing {fmt} files requires pyarrow")
+
+
+def _to_pandas(table) -> pd.DataFrame:
+    # split_blocks keeps each column in its own block, so no consolidation
+    # copy; self_destruct releases Arrow buffers as columns are converted
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_frame(source, columns: list | None = None, fmt: str | None = None):
+    """Read a path or file-like object, keeping only ``columns`` (in file
+    order; missing ones are skipped)."""
+    fmt = file_format(source, fmt)
+    wanted = None if columns is None else set(columns)
+
+    if fmt == "csv":
+        usecols = None if wanted is None else (lambda c: c in wanted)
+        return pd.read_csv(source, usecols=usecols)
+
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        names = pq.read_schema(source).names
+        if hasattr(source, "seek"):
+            source.seek(0)
+        present = None if wanted is None else [c for c in names if c in wanted]
+        return _to_pandas(pq.read_table(source, columns=present))
+
+    if isinstance(source, (str, Path)):
+        source = pa.memory_map(str(source), "r")
+    reader = pa.ipc.open_file(source)
+    table = reader.read_all()
+    if wanted is not None:
+        table = table.select([c for c in table.column_names if c in wanted])
+    return _to_pandas(table)
+
+
+def read_deals(source, fmt: str | None = None) -> pd.DataFrame:
+    return read_frame(source, DEAL_COLUMNS, fmt)
+
+
+def read_vehicles(source, fmt: str | None = None) -> pd.DataFrame:
+    return read_frame(source, VEHICLE_COLUMNS, fmt)
+
+
+def write_frame(df: pd.DataFrame, dest, fmt: str | None = None) -> None:
+    """Write to a path or binary file-like object; the index is dropped."""
+    fmt = file_format(dest, fmt)
+
+    if fmt == "csv":
+        df.to_csv(dest, index=False)
+        return
+
+    _require_pyarrow(fmt)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        pq.write_table(table, dest)
+        return
+
+    if isinstance(dest, (str, Path)):
+        dest = str(dest)
+    with pa.ipc.new_file(dest, table.schema) as writer:
+        writer.write_table(table)
+
+
+def write_result(result, dest, fmt: str | None = None) -> None:
+    # Long format: Deal #, Deal, Facility, Vehicle, Allocation ($)
+    write_frame(result.to_frame(), dest, fmt)
@@ -0,0 +1,198 @@
+"""Benchmark suite for the allocation pipeline.
+
+    python -m allocation.bench --out bench.json
+
+Times each pipeline stage on synthetic books over a grid of deal and
+vehicle counts and writes the results as JSON, so runs from different
+versions can be diffed. Grid points whose dense (deal, vehicle, facility)
+tensors would exceed --max-pairs are recorded as skipped rather than run.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import clean_deals, clean_vehicles, compute_availability
+from allocation.eligibility import ThresholdIndex
+from allocation.engine import allocate
+from allocation.synthetic import synthetic_deals, synthetic_vehicles
+from allocation.tables import (
+    allocation_table,
+    consistency_table,
+    deal_name,
+    deal_summary_table,
+    pro_rata_table,
+)
+
+DEAL_COUNTS = [10, 1_000, 100_000]
+VEHICLE_COUNTS = [10, 100, 1_000, 5_000]
+
+
+def _best_of(fn, repeat: int):
+    # Minimum wall time over `repeat` runs, plus the last return value
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def build_tables(result, deals: pd.DataFrame, vdf: pd.DataFrame, n: int) -> int:
+    for pos, (idx, row) in enumerate(deals.head(n).iterrows()):
+        name = deal_name(idx, row)
+        deal_summary_table(name, row)
+        allocation_table(result, pos)
+        consistency_table(result, pos)
+        pro_rata_table(result, pos, vdf)
+    return min(n, len(deals))
+
+
+def bench_point(
+    n_deals: int, n_vehicles: int, *, repeat: int, table_deals: int, seed: int
+) -> list[dict]:
+    raw_deals = synthetic_deals(n_deals, seed=seed)
+    raw_vehicles = synthetic_vehicles(n_vehicles, seed=seed)
+
+    stages = []
+
+    def record(stage, seconds, **extra):
+        stages.append(
+            {
+                "deals": n_deals,
+                "vehicles": n_vehicles,
+                "stage": stage,
+                "seconds": seconds,
+                **extra,
+            }
+        )
+
+    t, deals = _best_of(lambda: clean_deals(raw_deals), repeat)
+    record("clean_deals", t, rows=len(deals))
+
+    t, vdf = _best_of(lambda: clean_vehicles(raw_vehicles), repeat)
+    record("clean_vehicles", t, rows=len(vdf))
+
+    t, vdf = _best_of(lambda: compute_availability(vdf), repeat)
+    record("compute_availability", t, rows=len(vdf))
+
+    t, eligible = _best_of(lambda: ThresholdIndex.build(vdf).bitmap(deals), repeat)
+    record(
+        "eligibility",
+        t,
+        eligible_pairs=int(eligible.counts().sum()),
+        bitmap_bytes=eligible.nbytes,
+    )
+    del eligible
+
+    t, result = _best_of(lambda: allocate(deals, vdf), repeat)
+    record(
+        "allocate",
+        t,
+        allocations=int(np.count_nonzero(result.alloc)),
+        share_groups=result.share_groups,
+    )
+
+    t, built = _best_of(
+        lambda: build_tables(result, deals, vdf, table_deals), repeat
+    )
+    record("tables", t, deals_built=built, seconds_per_deal=t / max(built, 1))
+
+    return stages
+
+
+def run(
+    deal_counts,
+    vehicle_counts,
+    *,
+    repeat: int = 3,
+    table_deals: int = 20,
+    max_pairs: int = 20_000_000,
+    seed: int = 0,
+) -> dict:
+    results = []
+    for n_deals in deal_counts:
+        for n_vehicles in vehicle_counts:
+            if n_deals * n_vehicles > max_pairs:
+                results.append(
+                    {
+                        "deals": n_deals,
+                        "vehicles": n_vehicles,
+                        "skipped": f"deals x vehicles exceeds --max-pairs {max_pairs}",
+                    }
+                )
+                continue
+            results.extend(
+                bench_point(
+                    n_deals,
+                    n_vehicles,
+                    repeat=repeat,
+                    table_deals=table_deals,
+                    seed=seed,
+                )
+            )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m allocation.bench",
+        description="Time each allocation pipeline stage on synthetic books.",
+    )
+    parser.add_argument("--out", type=Path, default=Path("bench.json"))
+    parser.add_argument("--deals", type=int, nargs="+", default=DEAL_COUNTS)
+    parser.add_argument("--vehicles", type=int, nargs="+", default=VEHICLE_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--table-deals",
+        type=int,
+        default=20,
+        help="Deals to build display tables for (tables are per deal)",
+    )
+    parser.add_argument("--max-pairs", type=int, default=20_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.deals,
+        args.vehicles,
+        repeat=args.repeat,
+        table_deals=args.table_deals,
+        max_pairs=args.max_pairs,
+        seed=args.seed,
+    )
+    args.out.write_text(json.dumps(report, indent=2))
+
+    for row in report["results"]:
+        if "skipped" in row:
+            print(f"{row['deals']:>7} x {row['vehicles']:>5}  skipped")
+        else:
+            print(
+                f"{row['deals']:>7} x {row['vehicles']:>5}  "
+                f"{row['stage']:<21}{row['seconds'] * 1000:>10.2f} ms"
+            )
+    print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
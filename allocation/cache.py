@@ -0,0 +1,38 @@
+"""Content fingerprints and hit/miss bookkeeping for memoized pipeline stages."""
+
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    # Hashes every cell plus column names/dtypes, so any edit changes the key
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    h.update(repr([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    calls: Counter = field(default_factory=Counter)
+    misses: Counter = field(default_factory=Counter)
+
+    def call(self, stage: str) -> None:
+        self.calls[stage] += 1
+
+    def miss(self, stage: str) -> None:
+        self.misses[stage] += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        stages = list(self.calls)
+        return pd.DataFrame(
+            {
+                "Stage": stages,
+                "Hits": [self.calls[s] - self.misses[s] for s in stages],
+                "Misses": [self.misses[s] for s in stages],
+            }
+        )
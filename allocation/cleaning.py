@@ -0,0 +1,100 @@
+"""Cleaning into the compact schema of allocation.schema.
+
+Dollar columns become int64 cents, other numbers float32, toggles bool and
+low-cardinality text categoricals. Every column is converted once and the
+frame is assembled once.
+"""
+
+import numpy as np
+import pandas as pd
+
+from allocation.schema import CENTS, DEAL_DTYPES, DOLLAR_COLS, VEHICLE_DTYPES
+
+
+def _numeric(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce").fillna(0.0)
+
+
+def _cents(s: pd.Series) -> np.ndarray:
+    return np.round(_numeric(s).to_numpy(dtype=float) * CENTS).astype(np.int64)
+
+
+def _float32(s: pd.Series) -> np.ndarray:
+    return _numeric(s).to_numpy(dtype=np.float32)
+
+
+def _toggle(s: pd.Series) -> pd.Series:
+    return s.fillna(False).astype(bool)
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip()
+
+
+def _category(s: pd.Series) -> pd.Series:
+    return _text(s).astype("category")
+
+
+CONVERTERS = {
+    "cents": _cents,
+    "float32": _float32,
+    "bool": _toggle,
+    "category": _category,
+    "text": _text,
+}
+
+
+def _convert(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    # Columns outside the schema pass through untouched
+    return pd.DataFrame(
+        {
+            col: CONVERTERS[dtypes[col]](df[col]) if col in dtypes else df[col]
+            for col in df.columns
+        },
+        index=df.index,
+    )
+
+
+def clean_deals(df: pd.DataFrame) -> pd.DataFrame:
+    return _convert(df, DEAL_DTYPES)
+
+
+def clean_vehicles(df: pd.DataFrame) -> pd.DataFrame:
+    return _convert(df, VEHICLE_DTYPES)
+
+
+def compute_availability(vdf: pd.DataFrame) -> pd.DataFrame:
+    df = vdf.copy()
+    df["Availability ($)"] = (
+        df["Cash ($)"] + df["Unfunded Commitments ($)"] + df["Uncalled Capital ($)"]
+    )
+    return df
+
+
+def float_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    # float64 values of a cleaned column, dollar columns in dollars; zeros
+    # if the column is missing
+    if col not in df.columns:
+        return np.zeros(len(df))
+    values = df[col].to_numpy(dtype=float)
+    return values / CENTS if col in DOLLAR_COLS else values
+
+
+def cents_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    # int64 cents of a cleaned dollar column; zeros if the column is missing
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return df[col].to_numpy(dtype=np.int64)
+
+
+def to_dollars(df: pd.DataFrame) -> pd.DataFrame:
+    # Cleaned frame back to the editable layout: float dollars, plain text
+    out = {}
+    for col in df.columns:
+        if col in DOLLAR_COLS:
+            out[col] = float_column(df, col)
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            out[col] = df[col].astype(str)
+        else:
+            out[col] = df[col]
+    return pd.DataFrame(out, index=df.index)
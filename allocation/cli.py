@@ -0,0 +1,99 @@
+"""Headless batch runner: python -m allocation --deals D --vehicles V --out O
+
+Reads deal and vehicle books (CSV, Parquet or Arrow IPC, same columns as the
+tables in app.py; other columns are skipped), runs the cleaning / availability
+/ allocation pipeline and writes a long-format allocation file. Never imports
+streamlit.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from allocation.arrow_io import read_deals, read_vehicles, write_frame
+from allocation.cleaning import clean_deals, clean_vehicles, compute_availability
+from allocation.engine import allocate
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m allocation",
+        description="Allocate a deal book across vehicles without the Streamlit UI.",
+    )
+    parser.add_argument(
+        "--deals",
+        type=Path,
+        required=True,
+        help="Deal book (.csv, .parquet or .arrow)",
+    )
+    parser.add_argument(
+        "--vehicles",
+        type=Path,
+        required=True,
+        help="Vehicle table (.csv, .parquet or .arrow)",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        required=True,
+        help="Allocation output (.csv, .parquet or .arrow)",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Draw down availability deal by deal in Est. Closing Date order",
+    )
+    parser.add_argument(
+        "--cap-target",
+        action="store_true",
+        help="Cap each vehicle at its Target Hold and redistribute the excess",
+    )
+    parser.add_argument(
+        "--ic-hold",
+        action="store_true",
+        help="Allocate only each deal's IC Approved Hold",
+    )
+    parser.add_argument(
+        "--lot-size",
+        type=float,
+        default=None,
+        help="Round allocations to whole lots of this many dollars",
+    )
+    parser.add_argument(
+        "--cents",
+        action="store_true",
+        help="Allocate in integer cents so every tranche sums exactly",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    deals = clean_deals(read_deals(args.deals))
+    vdf = compute_availability(clean_vehicles(read_vehicles(args.vehicles)))
+
+    if not (vdf["Availability ($)"] > 0).any():
+        print(
+            "error: total availability across all vehicles is zero or invalid",
+            file=sys.stderr,
+        )
+        return 1
+
+    result = allocate(
+        deals,
+        vdf,
+        sequential=args.sequential,
+        cap_target=args.cap_target,
+        ic_hold=args.ic_hold,
+        lot_size=args.lot_size,
+        cents=args.cents,
+    )
+    out = result.to_frame()
+    write_frame(out, args.out)
+
+    print(
+        f"{len(deals)} deals x {len(vdf)} vehicles -> {len(out)} allocations "
+        f"written to {args.out}"
+    )
+    return 0
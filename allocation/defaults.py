@@ -0,0 +1,80 @@
+"""Starter deal book and vehicle table shown in the UI editors."""
+
+import pandas as pd
+
+default_deals = pd.DataFrame(
+    [
+        {
+            "Deal": "ABC Deal",
+            "Est. Closing Date": "2025-12-05",
+            "New Deal or Amendment": "New Deal",
+            "Transaction Type": "Div Recap",
+            "EBITDA ($mm)": 50.0,
+            "Senior Net Leverage (x)": 3.0,
+            "Total Leverage (x)": 4.0,
+            "Opening Spread (bps)": 400,
+            "Covenant Lite": "Yes",
+            "Internal Rating": "3 (Mid Risk)",
+            "S&P Rating": "B+",
+            "IC Approved Hold ($)": 50_000_000,
+            "Term Loan ($)": 150_000_000,
+            "Revolver ($)": 25_000_000,
+            "DDTL ($)": 5_000_000,
+        },
+        {
+            "Deal": "XXZ Deal",
+            "Est. Closing Date": "2025-12-10",
+            "New Deal or Amendment": "Amendment",
+            "Transaction Type": "LBO",
+            "EBITDA ($mm)": 70.0,
+            "Senior Net Leverage (x)": 3.5,
+            "Total Leverage (x)": 5.0,
+            "Opening Spread (bps)": 425,
+            "Covenant Lite": "No",
+            "Internal Rating": "4 (Higher Risk)",
+            "S&P Rating": "B",
+            "IC Approved Hold ($)": 75_000_000,
+            "Term Loan ($)": 250_000_000,
+            "Revolver ($)": 50_000_000,
+            "DDTL ($)": 15_000_000,
+        },
+    ]
+)
+
+default_vehicles = pd.DataFrame(
+    [
+        {
+            "Vehicle": "Fund 1",
+            "Cash ($)": 5_000_000,
+            "Unfunded Commitments ($)": 5_000_000,
+            "Uncalled Capital ($)": 10_000_000,
+            "Target Hold ($)": 40_000_000,
+            "Min EBITDA ($mm)": 0.0,
+            "Min Spread (bps)": 0.0,
+            "Revolver On": True,
+            "DDTL On": True,
+        },
+        {
+            "Vehicle": "Fund 2",
+            "Cash ($)": 5_000_000,
+            "Unfunded Commitments ($)": 5_000_000,
+            "Uncalled Capital ($)": 10_000_000,
+            "Target Hold ($)": 30_000_000,
+            "Min EBITDA ($mm)": 60.0,
+            "Min Spread (bps)": 400.0,
+            "Revolver On": True,
+            "DDTL On": False,
+        },
+        {
+            "Vehicle": "Fund 3",
+            "Cash ($)": 5_000_000,
+            "Unfunded Commitments ($)": 5_000_000,
+            "Uncalled Capital ($)": 10_000_000,
+            "Target Hold ($)": 20_000_000,
+            "Min EBITDA ($mm)": 0.0,
+            "Min Spread (bps)": 425.0,
+            "Revolver On": False,
+            "DDTL On": True,
+        },
+    ]
+)
@@ -0,0 +1,193 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import float_column
+from allocation.schema import FACILITIES, FACILITY_TOGGLE_COLS
+
+
+def facility_toggles(vdf: pd.DataFrame) -> np.ndarray:
+    toggles = np.ones((len(vdf), len(FACILITIES)), dtype=bool)
+    for f, col in enumerate(FACILITY_TOGGLE_COLS):
+        if col is not None:
+            toggles[:, f] = vdf[col].to_numpy(dtype=bool)
+    return toggles
+
+
+# =======================================
+# Packed eligibility bitmap
+# =======================================
+
+# Pairs unpacked at a time when a dense view is needed
+CHUNK_PAIRS = 1 << 22
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    # Set bits per row along the last (packed) axis
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT[bits].sum(axis=-1, dtype=np.int64)
+
+
+@dataclass
+class EligibilityBitmap:
+    """Deal x vehicle eligibility, one bit per pair per facility.
+
+    ``bits`` is (deal, facility, packed vehicles) uint8, an eighth of a
+    dense bool mask. Dense views are produced a chunk of deals at a time.
+    """
+
+    bits: np.ndarray
+    n_vehicles: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def counts(self) -> np.ndarray:
+        # (deal, facility) number of eligible vehicles
+        return popcount(self.bits)
+
+    def dense(self, rows=slice(None)) -> np.ndarray:
+        # (deal, vehicle, facility) bool for the selected deals
+        unpacked = np.unpackbits(self.bits[rows], axis=-1, count=self.n_vehicles)
+        return np.swapaxes(unpacked.view(bool), -1, -2)
+
+    def chunk_size(self) -> int:
+        return max(1, CHUNK_PAIRS // max(1, self.n_vehicles * self.bits.shape[1]))
+
+    def iter_dense(self):
+        # (start, dense chunk) over all deals with bounded memory
+        step = self.chunk_size()
+        for start in range(0, len(self), step):
+            yield start, self.dense(slice(start, start + step))
+
+    def eligible_vehicles(self, deal: int, facility: int) -> np.ndarray:
+        row = np.unpackbits(self.bits[deal, facility], count=self.n_vehicles)
+        return np.flatnonzero(row)
+
+    def vehicle_counts(self) -> np.ndarray:
+        # (vehicle, facility) number of deals each vehicle is eligible for
+        out = np.zeros((self.n_vehicles, self.bits.shape[1]), dtype=np.int64)
+        for _, chunk in self.iter_dense():
+            out += chunk.sum(axis=0)
+        return out
+
+    def signatures(self):
+        # Distinct eligible-vehicle sets across all (deal, facility) rows:
+        # (signature, packed vehicles) bits and the (deal, facility) index
+        # of each row's signature
+        n_rows, width = len(self) * self.bits.shape[1], self.bits.shape[2]
+        rows = np.ascontiguousarray(self.bits).reshape(n_rows, width)
+        keys = rows.view(np.dtype((np.void, width))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return rows[first], inverse.reshape(self.bits.shape[:2])
+
+    def any_of(self, vehicles: np.ndarray) -> np.ndarray:
+        # (deal,) True where any of the given vehicles is eligible for any
+        # facility, without unpacking
+        mask = np.zeros(self.n_vehicles, dtype=bool)
+        mask[vehicles] = True
+        return (self.bits & np.packbits(mask)).any(axis=(1, 2))
+
+    @staticmethod
+    def pack(dense: np.ndarray) -> np.ndarray:
+        # (..., vehicle, facility) bool -> (..., facility, packed vehicles)
+        return np.packbits(np.swapaxes(dense, -1, -2), axis=-1)
+
+
+# =======================================
+# Threshold index
+# =======================================
+
+def _prefix_bits(thresholds: np.ndarray):
+    # Sorted distinct levels, plus one packed vehicle bitset per prefix:
+    # row k holds the vehicles whose threshold is among the first k levels.
+    # Thresholds of 0 are ignored, so they sort first as -inf.
+    effective = np.where(thresholds <= 0, -np.inf, thresholds)
+    levels, level_of = np.unique(effective, return_inverse=True)
+    member = level_of[None, :] < np.arange(len(levels) + 1)[:, None]
+    return levels, np.packbits(member, axis=1)
+
+
+@dataclass
+class ThresholdIndex:
+    """Vehicle eligibility thresholds indexed once per run.
+
+    A deal's EBITDA and spread are binary-searched against the sorted
+    Min EBITDA / Min Spread levels; its eligible set is the AND of the two
+    matching prefix bitsets with the positive-availability bitset, and
+    per facility with the Revolver On / DDTL On bitsets.
+    """
+
+    n_vehicles: int
+    ebitda_levels: np.ndarray
+    ebitda_bits: np.ndarray  # (levels + 1, packed vehicles)
+    spread_levels: np.ndarray
+    spread_bits: np.ndarray
+    available_bits: np.ndarray  # (packed vehicles,)
+    toggle_bits: np.ndarray  # (facility, packed vehicles)
+
+    @classmethod
+    def build(cls, vdf: pd.DataFrame) -> "ThresholdIndex":
+        ebitda_levels, ebitda_bits = _prefix_bits(
+            float_column(vdf, "Min EBITDA ($mm)")
+        )
+        spread_levels, spread_bits = _prefix_bits(
+            float_column(vdf, "Min Spread (bps)")
+        )
+        avail = float_column(vdf, "Availability ($)")
+        return cls(
+            n_vehicles=len(vdf),
+            ebitda_levels=ebitda_levels,
+            ebitda_bits=ebitda_bits,
+            spread_levels=spread_levels,
+            spread_bits=spread_bits,
+            available_bits=np.packbits(avail > 0),
+            toggle_bits=np.packbits(facility_toggles(vdf).T, axis=1),
+        )
+
+    def deal_bits(self, deals: pd.DataFrame) -> np.ndarray:
+        # (deal, packed vehicles) eligibility before facility toggles
+        deal_ebitda = float_column(deals, "EBITDA ($mm)")
+        deal_spread = float_column(deals, "Opening Spread (bps)")
+        k_ebitda = np.searchsorted(self.ebitda_levels, deal_ebitda, side="right")
+        k_spread = np.searchsorted(self.spread_levels, deal_spread, side="right")
+        return (
+            self.ebitda_bits[k_ebitda]
+            & self.spread_bits[k_spread]
+            & self.available_bits
+        )
+
+    def bitmap(self, deals: pd.DataFrame) -> EligibilityBitmap:
+        bits = self.deal_bits(deals)[:, None, :] & self.toggle_bits[None, :, :]
+        return EligibilityBitmap(bits=bits, n_vehicles=self.n_vehicles)
+
+
+# =======================================
+# Dense masks
+# =======================================
+
+def deal_eligibility(
+    deals: pd.DataFrame, vdf: pd.DataFrame, index: ThresholdIndex | None = None
+) -> np.ndarray:
+    # (deal, vehicle) eligibility before facility toggles
+    if index is None:
+        index = ThresholdIndex.build(vdf)
+    bits = index.deal_bits(deals)
+    return np.unpackbits(bits, axis=-1, count=index.n_vehicles).view(bool)
+
+
+def eligibility_masks(
+    deals: pd.DataFrame, vdf: pd.DataFrame, index: ThresholdIndex | None = None
+) -> np.ndarray:
+    # (deal, vehicle, facility); prefer the packed bitmap for large books
+    if index is None:
+        index = ThresholdIndex.build(vdf)
+    return index.bitmap(deals).dense()
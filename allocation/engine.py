@@ -0,0 +1,423 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import cents_column, float_column
+from allocation.eligibility import EligibilityBitmap, ThresholdIndex
+from allocation.rounding import apportion_cents, cent_table, round_to_lots
+from allocation.schema import CENTS, FACILITIES, FACILITY_SIZE_COLS
+
+
+@dataclass
+class AllocationResult:
+    deals: list
+    vehicles: list
+    sizes: np.ndarray  # (deal, facility) tranche sizes
+    eligible: EligibilityBitmap  # packed (deal, facility, vehicle) bits
+    alloc: np.ndarray  # (deal, vehicle, facility) dollars
+    # Sequential mode only: processing order and each vehicle's remaining
+    # availability after each deal, (deal, vehicle)
+    order: np.ndarray | None = None
+    balance: np.ndarray | None = None
+    # IC hold mode only: IC Approved Hold split across tranches, (deal, facility)
+    hold: np.ndarray | None = None
+    # Distinct eligibility signatures when shares were grouped
+    share_groups: int | None = None
+    # Cents mode only: exact int64 cents behind ``alloc``, (deal, vehicle, facility)
+    cents: np.ndarray | None = None
+
+    @property
+    def unallocated(self) -> np.ndarray:
+        # (deal, facility) part of each tranche not placed with any vehicle
+        return self.sizes - self.alloc.sum(axis=1)
+
+    def to_frame(self) -> pd.DataFrame:
+        # Long format, one row per non-zero (deal, facility, vehicle) amount
+        d, f, v = np.nonzero(self.alloc.transpose(0, 2, 1))
+        return pd.DataFrame(
+            {
+                "Deal #": d + 1,
+                "Deal": np.asarray(self.deals, dtype=object)[d],
+                "Facility": np.asarray(FACILITIES, dtype=object)[f],
+                "Vehicle": np.asarray(self.vehicles, dtype=object)[v],
+                "Allocation ($)": self.alloc[d, v, f],
+            }
+        )
+
+
+# =======================================
+# Allocation
+# =======================================
+
+def tranche_sizes(deals: pd.DataFrame) -> np.ndarray:
+    return np.column_stack([float_column(deals, col) for col in FACILITY_SIZE_COLS])
+
+
+def ic_hold_split(deals: pd.DataFrame, sizes: np.ndarray) -> np.ndarray:
+    # IC Approved Hold is the most we take of a deal across all vehicles,
+    # split across tranches in proportion to tranche size and never more
+    # than the tranche itself. A hold of 0 means no limit.
+    ic_hold = float_column(deals, "IC Approved Hold ($)")
+    deal_total = np.maximum(sizes, 0.0).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(
+            (ic_hold > 0) & (deal_total > 0),
+            np.minimum(ic_hold / deal_total, 1.0),
+            1.0,
+        )
+    return sizes * scale[..., None]
+
+
+def closing_order(deals: pd.DataFrame) -> np.ndarray:
+    # Earliest Est. Closing Date first; ties keep book order, bad dates go last
+    if "Est. Closing Date" not in deals.columns:
+        return np.arange(len(deals))
+    dates = pd.to_datetime(
+        deals["Est. Closing Date"], errors="coerce", format="mixed"
+    ).to_numpy(dtype="datetime64[ns]")
+    return np.argsort(dates, kind="stable")
+
+
+def pro_rata(weights: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    # weights (..., vehicle, facility), sizes (..., facility)
+    den = weights.sum(axis=-2)
+
+    # A tranche is allocated only if it has a size and someone can take it
+    active = (sizes > 0) & (den > 0)
+
+    shares = np.zeros_like(weights)
+    np.divide(weights, den[..., None, :], out=shares, where=active[..., None, :])
+    return shares * sizes[..., None, :]
+
+
+def water_fill(
+    weights: np.ndarray, caps: np.ndarray, totals: np.ndarray
+) -> np.ndarray:
+    """Split ``totals`` pro-rata by ``weights`` with each vehicle capped at
+    ``caps``; the excess flows pro-rata to the uncapped vehicles.
+
+    weights / caps are (..., vehicle), totals is (...). Vehicles are sorted
+    by cap / weight, so the fill level is found in O(n log n) per tranche
+    without re-solving. If every eligible vehicle hits its cap, the rest of
+    the tranche is left unallocated.
+    """
+    eligible = weights > 0
+    caps = np.where(eligible, caps, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(eligible, caps / weights, np.inf)
+
+    idx = np.argsort(ratio, axis=-1, kind="stable")
+    w = np.take_along_axis(weights, idx, axis=-1)
+    c = np.take_along_axis(caps, idx, axis=-1)
+    r = np.take_along_axis(ratio, idx, axis=-1)
+
+    # Candidate k: the k vehicles with the lowest ratio are capped and the
+    # rest share what is left at fill level lam[k]
+    zeros = np.zeros(c.shape[:-1] + (1,))
+    capped = np.concatenate([zeros, np.cumsum(c, axis=-1)[..., :-1]], axis=-1)
+    uncapped_w = np.cumsum(w[..., ::-1], axis=-1)[..., ::-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lam = (totals[..., None] - capped) / uncapped_w
+
+    # The first k whose own vehicle stays under its cap is the solution
+    ok = (uncapped_w > 0) & (lam <= r)
+    found = ok.any(axis=-1, keepdims=True)
+    k = np.argmax(ok, axis=-1)[..., None]
+    level = np.where(found, np.take_along_axis(lam, k, axis=-1), 0.0)
+
+    alloc = np.where(found, np.minimum(weights * level, caps), caps)
+    return np.where(totals[..., None] > 0, alloc, 0.0)
+
+
+def _target_pass(weights, short, room, uncapped):
+    # One water-fill of the (..., facility, vehicle) tranches still short:
+    # each vehicle's room is split over the short tranches it can take in
+    # proportion to their shortfall
+    elig_short = np.where(weights > 0, short[..., None], 0.0)
+    total_short = elig_short.sum(axis=-2, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        caps = room[..., None, :] * elig_short / total_short
+    caps = np.where(uncapped[..., None, :], np.inf, caps)
+
+    todo = short > 0
+    fill = np.zeros(caps.shape)
+    fill[todo] = water_fill(
+        np.broadcast_to(weights, caps.shape)[todo], caps[todo], short[todo]
+    )
+    return fill
+
+
+def capped_pro_rata(
+    weights: np.ndarray, sizes: np.ndarray, targets: np.ndarray
+) -> np.ndarray:
+    # Each vehicle's Target Hold caps its total across the deal (0 = no cap);
+    # targets is (..., vehicle), broadcasting against the weights. The first
+    # pass splits each cap by tranche size. A vehicle left with room was
+    # under its cap in some tranche, which is then full, so one more pass
+    # per facility over the deals still short leaves no tranche short while
+    # an eligible vehicle is still under its Target Hold.
+    weights = np.swapaxes(weights, -1, -2)  # (..., facility, vehicle)
+    short = np.maximum(sizes, 0.0)
+    uncapped = targets <= 0
+    room = np.where(uncapped, 0.0, targets)
+    filled = _target_pass(weights, short, room, uncapped)
+
+    # Deals with a short tranche that a vehicle with room can still take
+    short = np.maximum(short - filled.sum(axis=-1), 0.0)
+    room = np.maximum(room - filled.sum(axis=-2), 0.0)
+    has_room = uncapped | (room > 0)
+    active = ((short[..., None] > 0) & (weights > 0) & has_room[..., None, :]).any(
+        axis=(-2, -1)
+    )
+    if active.any():
+        batch = filled.shape[:-2]
+        n_vehicles = filled.shape[-1]
+        sub = filled[active]
+        w = np.broadcast_to(weights, filled.shape)[active]
+        s = short[active]
+        u = np.broadcast_to(uncapped, batch + (n_vehicles,))[active]
+        r = room[active]
+        for _ in range(sizes.shape[-1] - 1):
+            fill = _target_pass(w, s, r, u)
+            if not (fill > 0).any():
+                break
+            sub += fill
+            s = np.maximum(s - fill.sum(axis=-1), 0.0)
+            r = np.maximum(r - fill.sum(axis=-2), 0.0)
+        filled[active] = sub
+    return np.swapaxes(filled, -1, -2)
+
+
+# Largest signature x vehicle share table worth building before falling back
+# to per-deal shares (float64 cells)
+MAX_SHARE_CELLS = 1 << 24
+
+
+def grouped_shares(eligible: EligibilityBitmap, avail: np.ndarray):
+    # Pro-rata shares depend only on the eligible set, so they are computed
+    # once per distinct signature: (signature, vehicle) shares, all zero if
+    # nobody can take it, plus each (deal, facility)'s signature. None when
+    # the book has too many distinct signatures for that to pay off.
+    signatures, group = eligible.signatures()
+    if len(signatures) * len(avail) > MAX_SHARE_CELLS:
+        return None
+
+    mask = np.unpackbits(signatures, axis=-1, count=len(avail)).view(bool)
+    weights = np.where(mask, avail, 0.0)
+    den = weights.sum(axis=-1, keepdims=True)
+    shares = np.zeros_like(weights)
+    np.divide(weights, den, out=shares, where=den > 0)
+    return shares, group
+
+
+# (deal, facility, vehicle) cells apportioned per block in cents mode
+CENT_BLOCK_CELLS = 1 << 17
+
+
+def _signature_ranks(mask: np.ndarray, order: np.ndarray) -> np.ndarray:
+    # Leftover-cent priority of each signature's vehicles without a sort
+    # per row: ``order`` lists the vehicles by descending availability once,
+    # and each signature numbers its eligible vehicles in that order.
+    # Ineligible vehicles rank past every leftover cent.
+    ranks = np.empty(mask.shape, dtype=np.int32)
+    ranks[:, order] = np.cumsum(mask[:, order], axis=1) - 1
+    return np.where(mask, ranks, mask.shape[1])
+
+
+def _allocate_cents(
+    eligible: EligibilityBitmap, avail: np.ndarray, amounts: np.ndarray
+):
+    # Integer pro-rata of int64 cent amounts by int64 cent availability:
+    # (deal, vehicle, facility) cents, the same in dollars, and the number
+    # of signature groups when one table served the whole book
+    n_deals, n_fac = amounts.shape
+    n_vehicles = eligible.n_vehicles
+    avail = np.maximum(avail, 0)
+    order = np.argsort(-avail, kind="stable")
+
+    def table_of(signatures):
+        mask = np.unpackbits(signatures, axis=-1, count=n_vehicles).view(bool)
+        return cent_table(np.where(mask, avail, 0), _signature_ranks(mask, order))
+
+    signatures, group = eligible.signatures()
+    grouped = len(signatures) * n_vehicles <= MAX_SHARE_CELLS
+    if grouped:
+        table = table_of(signatures)
+
+    # Blocks small enough that the passes over them stay in cache
+    cents = np.zeros((n_deals, n_vehicles, n_fac), dtype=np.int64)
+    alloc = np.zeros(cents.shape)
+    step = max(1, CENT_BLOCK_CELLS // (n_vehicles * n_fac))
+    for start in range(0, n_deals, step):
+        rows = slice(start, start + step)
+        if grouped:
+            out = apportion_cents(table, amounts[rows], group[rows])
+        else:
+            # Too many signatures for one table: just the ones this chunk uses
+            used, local = np.unique(group[rows], return_inverse=True)
+            out = apportion_cents(
+                table_of(signatures[used]),
+                amounts[rows],
+                local.reshape(group[rows].shape),
+            )
+        for f in range(n_fac):
+            np.copyto(cents[rows, :, f], out[:, f], casting="unsafe")
+        np.divide(cents[rows], CENTS, out=alloc[rows])
+    return cents, alloc, len(signatures) if grouped else None
+
+
+def _split(weights, amounts, targets, lot_size):
+    # One block of deals: pro-rata (optionally capped), then lot rounding
+    # that keeps capped vehicles within their caps
+    if targets is None:
+        alloc = pro_rata(weights, amounts)
+        caps = None
+    else:
+        alloc = capped_pro_rata(weights, amounts, targets)
+        caps = np.where(targets > 0, targets, np.inf)
+    if lot_size:
+        alloc = round_to_lots(alloc, lot_size, caps)
+    return alloc
+
+
+def _sequential_split(weights, amounts, remaining, targets, lot_size):
+    # One sequential step: no vehicle takes more of the deal, across all its
+    # tranches, than it has left (nor more than its Target Hold, when
+    # capped). What no eligible vehicle has room for stays unallocated.
+    caps = remaining
+    if targets is not None:
+        caps = np.where(targets > 0, np.minimum(targets, remaining), remaining)
+    return _split(weights, amounts, caps, lot_size)
+
+
+def _allocate_sequential(
+    eligible: EligibilityBitmap,
+    avail: np.ndarray,
+    sizes: np.ndarray,
+    order: np.ndarray,
+    targets: np.ndarray | None,
+    lot_size: float | None,
+):
+    # Deals are inherently serial here; each step is vectorized over
+    # vehicles x facilities
+    remaining = avail.copy()
+    step_bits = np.zeros_like(eligible.bits)
+    alloc = np.zeros((len(sizes), len(avail), eligible.bits.shape[1]))
+    balance = np.zeros((len(sizes), len(avail)))
+
+    for d in order:
+        elig = eligible.dense(d) & (remaining > 0)[:, None]
+        weights = np.where(elig, remaining[:, None], 0.0)
+        alloc[d] = _sequential_split(weights, sizes[d], remaining, targets, lot_size)
+        # Floored at zero only to absorb floating-point noise
+        remaining = np.maximum(remaining - alloc[d].sum(axis=1), 0.0)
+        step_bits[d] = EligibilityBitmap.pack(elig)
+        balance[d] = remaining
+
+    step_eligible = EligibilityBitmap(bits=step_bits, n_vehicles=len(avail))
+    return step_eligible, alloc, balance
+
+
+def allocate(
+    deals: pd.DataFrame,
+    vdf: pd.DataFrame,
+    *,
+    sequential: bool = False,
+    cap_target: bool = False,
+    ic_hold: bool = False,
+    lot_size: float | None = None,
+    cents: bool = False,
+) -> AllocationResult:
+    """Pro-rata allocation of every deal's tranches across eligible vehicles.
+
+    Expects frames already passed through clean_deals / clean_vehicles /
+    compute_availability. With ``sequential=True`` deals are processed in
+    Est. Closing Date order and each one is weighted by, and draws down,
+    the availability left over from earlier deals; no vehicle takes more
+    than it has left, and what the vehicles cannot cover is reported as
+    unallocated. With ``cap_target=True``
+    no vehicle takes more than its Target Hold of a deal; the excess is
+    redistributed by water-filling. With ``ic_hold=True`` only the deal's
+    IC Approved Hold is allocated and the rest of each tranche is reported
+    as unallocated. With ``lot_size`` set, allocations are rounded to whole
+    lots by largest remainder, keeping each tranche's total exact; when
+    vehicles are capped, rounding never takes one past its cap and lots
+    that fit nowhere are unallocated. With
+    ``cents=True`` allocations are exact int64 cents (``result.cents``) that
+    add up to each tranche to the cent: plain and IC hold runs split cents
+    by integer arithmetic, other modes round their float allocations to
+    cents by largest remainder.
+    """
+    avail = float_column(vdf, "Availability ($)")
+    sizes = tranche_sizes(deals)
+    eligible = ThresholdIndex.build(vdf).bitmap(deals)
+    targets = float_column(vdf, "Target Hold ($)") if cap_target else None
+
+    # Amount of each tranche to place across vehicles
+    hold = ic_hold_split(deals, sizes) if ic_hold else None
+    amounts = sizes if hold is None else hold
+
+    order = balance = share_groups = alloc_cents = None
+    integer_path = cents and not (sequential or targets is not None or lot_size)
+
+    if integer_path:
+        if hold is None:
+            amount_cents = np.column_stack(
+                [cents_column(deals, col) for col in FACILITY_SIZE_COLS]
+            )
+        else:
+            amount_cents = np.round(hold * CENTS).astype(np.int64)
+        avail_cents = cents_column(vdf, "Availability ($)")
+        alloc_cents, alloc, share_groups = _allocate_cents(
+            eligible, avail_cents, amount_cents
+        )
+    elif sequential:
+        order = closing_order(deals)
+        eligible, alloc, balance = _allocate_sequential(
+            eligible, avail, amounts, order, targets, lot_size
+        )
+    else:
+        alloc = np.zeros((len(deals), len(avail), len(FACILITIES)))
+        grouped = grouped_shares(eligible, avail) if targets is None else None
+
+        if grouped is not None:
+            # Broadcast each signature's shares by the tranche sizes
+            shares, group = grouped
+            share_groups = len(shares)
+            positive = np.maximum(amounts, 0.0)
+            step = eligible.chunk_size()
+            for start in range(0, len(deals), step):
+                rows = slice(start, start + step)
+                out = np.swapaxes(alloc[rows], -1, -2)
+                np.multiply(shares[group[rows]], positive[rows][..., None], out=out)
+                if lot_size:
+                    alloc[rows] = round_to_lots(alloc[rows], lot_size)
+        else:
+            # Eligibility stays packed; one chunk of deals is dense at a time
+            for start, elig in eligible.iter_dense():
+                rows = slice(start, start + len(elig))
+                weights = np.where(elig, avail[None, :, None], 0.0)
+                alloc[rows] = _split(weights, amounts[rows], targets, lot_size)
+
+    if cents and alloc_cents is None:
+        alloc_cents = round_to_lots(alloc * CENTS, 1).round().astype(np.int64)
+        alloc = alloc_cents / CENTS
+
+    if "Deal" in deals.columns:
+        names = deals["Deal"].tolist()
+    else:
+        names = [f"Deal {i + 1}" for i in range(len(deals))]
+
+    return AllocationResult(
+        deals=names,
+        vehicles=vdf["Vehicle"].tolist(),
+        sizes=sizes,
+        eligible=eligible,
+        alloc=alloc,
+        order=order,
+        balance=balance,
+        hold=hold,
+        share_groups=share_groups,
+        cents=alloc_cents,
+    )
@@ -0,0 +1,56 @@
+import math
+
+
+def fmt_dollars(x) -> str:
+    try:
+        if x is None or (isinstance(x, float) and math.isnan(x)):
+            x = 0.0
+        return f"${float(x):,.0f}"
+    except Exception:
+        return "$0"
+
+
+def fmt_percent(x) -> str:
+    try:
+        if x is None or (isinstance(x, float) and math.isnan(x)):
+            x = 0.0
+        return f"{float(x):,.2f}%"
+    except Exception:
+        return "0.00%"
+
+
+# =======================================
+# Column display formats
+# =======================================
+
+# st.column_config.NumberColumn formats: the numbers stay numeric (and
+# sortable) and the browser formats them
+DOLLAR_FORMAT = "dollar"
+PERCENT_FORMAT = "%.2f%%"
+
+# Format of a column, by the unit at the end of its name
+UNIT_FORMATS = {
+    "($)": DOLLAR_FORMAT,
+    "(%)": PERCENT_FORMAT,
+    "($mm)": "%.2f",
+    "(x)": "%.2f",
+    "(bps)": "%.0f",
+}
+
+
+def column_formats(df, default: str | None = None) -> dict:
+    # Display format of each numeric column of ``df``, from its unit suffix
+    # ("% of ..." columns are percents); ``default`` for the rest
+    formats = {}
+    for col in df.columns:
+        if df[col].dtype.kind not in "iuf":
+            continue
+        name = str(col)
+        unit = next((f for u, f in UNIT_FORMATS.items() if name.endswith(u)), None)
+        if unit is None and name.startswith("%"):
+            unit = PERCENT_FORMAT
+        if unit is None:
+            unit = default
+        if unit is not None:
+            formats[col] = unit
+    return formats
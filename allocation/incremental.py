@@ -0,0 +1,148 @@
+"""Incremental re-allocation between runs.
+
+Deal rows are matched to the previous run by content hash, so edits,
+insertions and deletions (which shift row positions) only recompute the rows
+that actually changed. When vehicle rows change, only deals where a changed
+vehicle was or now is eligible are recomputed. Adding, removing or renaming
+vehicles changes the tensor layout and falls back to a full allocate(), as
+do changed allocate() options and sequential mode, where every deal depends
+on the ones closing before it.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from allocation.eligibility import EligibilityBitmap, deal_eligibility
+from allocation.engine import AllocationResult, allocate
+
+
+# AllocationResult arrays indexed by deal along their first axis
+PER_DEAL_FIELDS = ["sizes", "alloc", "hold", "cents"]
+
+
+@dataclass
+class IncrementalState:
+    deal_hashes: np.ndarray
+    vehicle_hashes: np.ndarray
+    result: AllocationResult
+    recomputed: np.ndarray  # bool per deal, True if allocated in this run
+    options: dict  # allocate() keyword options the result was computed with
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _match_rows(prev_hashes: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    # Position of an identical row in the previous run, -1 if none
+    prev_idx = pd.Index(prev_hashes)
+    first = ~prev_idx.duplicated()
+    loc = prev_idx[first].get_indexer(hashes)
+    return np.where(loc >= 0, np.flatnonzero(first)[loc], -1)
+
+
+def allocate_incremental(
+    deals: pd.DataFrame,
+    vdf: pd.DataFrame,
+    prev: IncrementalState | None = None,
+    **options,
+) -> IncrementalState:
+    deal_hashes = row_hashes(deals)
+    vehicle_hashes = row_hashes(vdf)
+    vehicles = vdf["Vehicle"].tolist()
+
+    if (
+        options.get("sequential")
+        or prev is None
+        or prev.options != options
+        or prev.result.vehicles != vehicles
+    ):
+        return IncrementalState(
+            deal_hashes=deal_hashes,
+            vehicle_hashes=vehicle_hashes,
+            result=allocate(deals, vdf, **options),
+            recomputed=np.ones(len(deals), dtype=bool),
+            options=options,
+        )
+
+    prev_pos = _match_rows(prev.deal_hashes, deal_hashes)
+    stale = prev_pos < 0
+
+    changed = np.flatnonzero(vehicle_hashes != prev.vehicle_hashes)
+    if changed.size:
+        # Deal-level eligibility (before toggles) is a superset of every
+        # facility's eligible set, so it also covers toggle flips
+        was = prev.result.eligible.any_of(changed)
+        now = deal_eligibility(deals, vdf.iloc[changed]).any(axis=1)
+        stale |= now | np.where(prev_pos >= 0, was[prev_pos], True)
+
+    keep = ~stale
+    src = prev_pos[keep]
+
+    # Per-deal arrays: unchanged rows are copied from the previous run,
+    # stale rows are filled from a partial allocate()
+    arrays = {"eligible": prev.result.eligible.bits}
+    for name in PER_DEAL_FIELDS:
+        if getattr(prev.result, name) is not None:
+            arrays[name] = getattr(prev.result, name)
+
+    fields = {}
+    for name, prev_arr in arrays.items():
+        arr = np.zeros((len(deals),) + prev_arr.shape[1:], dtype=prev_arr.dtype)
+        arr[keep] = prev_arr[src]
+        fields[name] = arr
+
+    if stale.any():
+        part = allocate(deals.iloc[np.flatnonzero(stale)], vdf, **options)
+        fields["eligible"][stale] = part.eligible.bits
+        for name in PER_DEAL_FIELDS:
+            if name in fields:
+                fields[name][stale] = getattr(part, name)
+
+    fields["eligible"] = EligibilityBitmap(
+        bits=fields["eligible"], n_vehicles=len(vehicles)
+    )
+
+    if "Deal" in deals.columns:
+        names = deals["Deal"].tolist()
+    else:
+        names = [f"Deal {i + 1}" for i in range(len(deals))]
+
+    return IncrementalState(
+        deal_hashes=deal_hashes,
+        vehicle_hashes=vehicle_hashes,
+        result=AllocationResult(deals=names, vehicles=vehicles, **fields),
+        recomputed=stale,
+        options=options,
+    )
+
+
+def concat_states(states: list) -> IncrementalState:
+    # States of consecutive slices of one book (same vehicles and options)
+    # joined into the state of the whole book
+    if len(states) == 1:
+        return states[0]
+    results = [s.result for s in states]
+    fields = {
+        name: np.concatenate([getattr(r, name) for r in results])
+        for name in PER_DEAL_FIELDS
+        if getattr(results[0], name) is not None
+    }
+    eligible = EligibilityBitmap(
+        bits=np.concatenate([r.eligible.bits for r in results]),
+        n_vehicles=results[0].eligible.n_vehicles,
+    )
+    return IncrementalState(
+        deal_hashes=np.concatenate([s.deal_hashes for s in states]),
+        vehicle_hashes=states[0].vehicle_hashes,
+        result=AllocationResult(
+            deals=[name for r in results for name in r.deals],
+            vehicles=results[0].vehicles,
+            eligible=eligible,
+            **fields,
+        ),
+        recomputed=np.concatenate([s.recomputed for s in states]),
+        options=states[0].options,
+    )
@@ -0,0 +1,147 @@
+"""Background allocation of large books, a chunk of deals at a time.
+
+An AllocationJob runs allocate_incremental over consecutive slices of the
+book in a worker thread. NumPy releases the GIL in the heavy kernels, so
+the UI thread stays free to poll progress, show the deals finished so
+far and cancel between chunks. Sequential mode is a single chunk: every
+deal depends on the ones closing before it.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from allocation.incremental import (
+    IncrementalState,
+    allocate_incremental,
+    concat_states,
+)
+
+# Aim for this many progress steps, with at least MIN_CHUNK_DEALS per chunk
+PROGRESS_STEPS = 50
+MIN_CHUNK_DEALS = 500
+
+
+class AllocationJob:
+    """allocate_incremental(deals, vdf, prev, **options) in a worker thread.
+
+    Call start(), then poll deals_done / throughput, vehicle_totals() and
+    latest() while it runs; cancel() stops after the current chunk and
+    state() joins the finished chunks.
+    """
+
+    def __init__(
+        self,
+        deals: pd.DataFrame,
+        vdf: pd.DataFrame,
+        prev: IncrementalState | None = None,
+        *,
+        chunk_size: int | None = None,
+        **options,
+    ):
+        self.deals = deals
+        self.vdf = vdf
+        self.prev = prev
+        self.options = options
+        self.n_deals = len(deals)
+        if options.get("sequential"):
+            chunk_size = self.n_deals
+        elif chunk_size is None:
+            chunk_size = max(MIN_CHUNK_DEALS, math.ceil(self.n_deals / PROGRESS_STEPS))
+        self.chunk_size = max(1, chunk_size)
+
+        self.error: BaseException | None = None
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._states = []
+        self._totals = np.zeros(len(vdf))  # allocated per vehicle so far
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "AllocationJob":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            for start in range(0, self.n_deals, self.chunk_size):
+                if self._cancel.is_set():
+                    break
+                chunk = self.deals.iloc[start : start + self.chunk_size]
+                state = allocate_incremental(chunk, self.vdf, self.prev, **self.options)
+                totals = state.result.alloc.sum(axis=(0, 2))
+                with self._lock:
+                    self._states.append(state)
+                    self._totals = self._totals + totals
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.finished = time.perf_counter()
+
+    # =======================================
+    # Progress
+    # =======================================
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def complete(self) -> bool:
+        # Finished every deal without error or cancellation
+        return not self.running and self.error is None and (
+            self.deals_done == self.n_deals
+        )
+
+    @property
+    def deals_done(self) -> int:
+        with self._lock:
+            return sum(len(s.deal_hashes) for s in self._states)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def throughput(self) -> float:
+        # Deals per second so far
+        elapsed = self.elapsed
+        return self.deals_done / elapsed if elapsed > 0 else 0.0
+
+    def vehicle_totals(self) -> pd.DataFrame:
+        with self._lock:
+            totals = self._totals
+        return pd.DataFrame(
+            {"Vehicle": self.vdf["Vehicle"].tolist(), "Allocated ($)": totals}
+        )
+
+    def latest(self) -> tuple[int, IncrementalState] | None:
+        # Position of the first deal of the last finished chunk, and its state
+        with self._lock:
+            if not self._states:
+                return None
+            return (len(self._states) - 1) * self.chunk_size, self._states[-1]
+
+    def state(self) -> IncrementalState | None:
+        # The finished chunks as one state over the first deals_done deals
+        with self._lock:
+            states = list(self._states)
+        return concat_states(states) if states else None
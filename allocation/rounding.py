@@ -0,0 +1,183 @@
+"""Exact-sum rounding of allocations: whole lots, or integer cents."""
+
+import numpy as np
+
+# Lot sizes offered in the UI, in dollars
+LOT_SIZES = [1, 1_000, 250_000]
+
+
+def round_to_lots(
+    alloc: np.ndarray, lot_size: float, caps: np.ndarray | None = None
+) -> np.ndarray:
+    """Round (..., vehicle, facility) allocations to whole lots.
+
+    Largest-remainder apportionment, vectorized over every deal and tranche:
+    each vehicle gets the floor of its lots, then the lots still owed go to
+    the largest fractional remainders (ties to the earlier vehicle). Only
+    vehicles with a positive allocation can receive a lot. The tranche total
+    is first rounded to whole dollars; any part of it that is not a whole
+    number of lots goes to the vehicle with the largest allocation, so the
+    rounded cells add up to the tranche exactly.
+
+    With ``caps`` (..., vehicle) no vehicle's total across facilities goes
+    past its cap: where plain rounding would, lots owed go only to vehicles
+    with room for a whole lot, the odd amount only to one with room for it,
+    and what fits nowhere is left unallocated.
+    """
+    a = np.swapaxes(alloc, -1, -2)  # (..., facility, vehicle)
+    positive = a > 0
+
+    total = np.round(a.sum(axis=-1))
+    lots_owed = np.floor(total / lot_size)
+
+    q = np.where(positive, a, 0.0) / lot_size
+    base = np.floor(q)
+    remainder = np.where(positive, q - base, -1.0)
+
+    short = lots_owed - base.sum(axis=-1)
+    bumps = np.clip(short, 0, positive.sum(axis=-1))
+    lots = base + (_priority(remainder)[1] < bumps[..., None])
+
+    # Odd amount below one lot, plus any lots that had nowhere to go
+    odd = total - (base.sum(axis=-1) + bumps) * lot_size
+    out = lots * lot_size
+    largest = np.argmax(a, axis=-1)[..., None]
+    np.put_along_axis(
+        out,
+        largest,
+        np.take_along_axis(out, largest, axis=-1) + odd[..., None],
+        axis=-1,
+    )
+    out = np.where(total[..., None] > 0, out, 0.0)
+
+    if caps is not None:
+        # Deals where rounding pushed a vehicle past its cap are redone
+        caps = np.broadcast_to(caps, out.shape[:-2] + out.shape[-1:])
+        over = (out.sum(axis=-2) > caps).any(axis=-1)
+        if over.any():
+            out[over] = _round_within(
+                a[over],
+                base[over],
+                remainder[over],
+                short[over],
+                total[over],
+                lot_size,
+                caps[over],
+            )
+    return np.swapaxes(out, -1, -2)
+
+
+def _priority(remainder: np.ndarray):
+    # Vehicles by descending remainder, ties to the earlier: the order, and
+    # each vehicle's position in it
+    order = np.argsort(-remainder, axis=-1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(remainder.shape[-1]), axis=-1)
+    return order, rank
+
+
+def _round_within(a, base, remainder, short, total, lot_size, caps):
+    # Facility by facility, so a vehicle's room is shared across tranches.
+    # (..., facility, vehicle) floors and remainders; caps is (..., vehicle).
+    lots = base.copy()
+    room = np.floor((caps - base.sum(axis=-2) * lot_size) / lot_size)
+    for f in range(a.shape[-2]):
+        rem = np.where(room >= 1, remainder[..., f, :], -1.0)
+        can = rem >= 0
+        bumps = np.clip(short[..., f], 0, can.sum(axis=-1))
+        order, rank = _priority(rem)
+        bump = can & (rank < bumps[..., None])
+
+        # Lots still owed once every candidate has one go to them again in
+        # the same order, each taking as many as it has room for
+        free = np.take_along_axis(np.where(can, room - bump, 0.0), order, axis=-1)
+        before = np.cumsum(free, axis=-1)
+        before = np.concatenate(
+            [np.zeros_like(before[..., :1]), before[..., :-1]], axis=-1
+        )
+        take = np.clip((short[..., f] - bumps)[..., None] - before, 0, free)
+        more = np.empty_like(take)
+        np.put_along_axis(more, order, take, axis=-1)
+
+        lots[..., f, :] += bump + more
+        room = room - bump - more
+
+    # Odd amount below one lot to the largest allocation with room for it
+    out = lots * lot_size
+    odd = total - np.floor(total / lot_size) * lot_size
+    spare = caps - out.sum(axis=-2)
+    for f in range(a.shape[-2]):
+        fits = (a[..., f, :] > 0) & (spare >= odd[..., f, None])
+        pick = np.argmax(np.where(fits, a[..., f, :], -1.0), axis=-1)[..., None]
+        extra = np.where(fits.any(axis=-1), odd[..., f], 0.0)[..., None]
+        col = out[..., f, :]
+        np.put_along_axis(
+            col, pick, np.take_along_axis(col, pick, axis=-1) + extra, axis=-1
+        )
+        spare = spare - extra * (np.arange(a.shape[-1]) == pick)
+    return np.where(total[..., None] > 0, out, 0.0)
+
+
+# =======================================
+# Integer cents
+# =======================================
+
+def floor_mul_div(a: np.ndarray, b: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """Exact floor(a * b / den) for non-negative int64 with a * b / den in range.
+
+    The float64 estimate is off by at most one, and the residual
+    a * b - q * den is small, so int64 wraparound computes it exactly even
+    when a * b itself overflows; it then corrects the estimate.
+    """
+    q = np.floor(a / den * b).astype(np.int64)
+    with np.errstate(over="ignore"):
+        residual = a * b - q * den
+    return q + (residual >= den) - (residual < 0)
+
+
+# Relative error bound on a float64 share x amount, ten times the few
+# roundings (share, scaled amount, product) it can carry
+SHARE_TOLERANCE = 2.0**-48
+
+
+def cent_table(weights: np.ndarray, rank: np.ndarray):
+    # (signature, vehicle) int64 weights and leftover-cent ranks, with the
+    # float shares and row totals apportion_cents reads from them, so a
+    # table built once serves every chunk of deals
+    den = weights.sum(axis=-1)
+    shares = np.zeros(weights.shape)
+    np.divide(weights, den[:, None], out=shares, where=den[:, None] > 0)
+    return weights, shares, den, rank
+
+
+def apportion_cents(table, amounts: np.ndarray, group: np.ndarray) -> np.ndarray:
+    """Split int64 ``amounts`` (...) pro-rata by the weights of a cent_table.
+
+    ``group`` (...) is the table row of each amount. Every vehicle gets the
+    exact floor of its share; the cents left over (fewer than one per
+    eligible vehicle) go one each in rank order, so each tranche adds up
+    exactly. Tranches with no size or no weight get nothing. Returns
+    (..., vehicle) whole cents as float64.
+    """
+    weights, shares, den, rank = table
+    amounts = np.where((amounts > 0) & (den[group] > 0), amounts, 0)
+
+    # Each share x amount floored from just below and just above: where the
+    # two agree the float floor is exact, and the rest (shares landing on or
+    # within rounding error of a whole cent) are redone in integers
+    whole = np.take(shares, group, axis=0)
+    whole *= (amounts * (1.0 - SHARE_TOLERANCE))[..., None]
+    high = whole * ((1.0 + SHARE_TOLERANCE) / (1.0 - SHARE_TOLERANCE))
+    np.floor(whole, out=whole)
+    np.floor(high, out=high)
+    cells = np.flatnonzero(whole != high)
+    if len(cells):
+        *cell, v = np.unravel_index(cells, whole.shape)
+        sig = group[tuple(cell)]
+        whole.flat[cells] = floor_mul_div(
+            weights[sig, v], amounts[tuple(cell)], den[sig]
+        )
+
+    left = amounts - whole.sum(axis=-1)
+    whole += np.take(rank, group, axis=0) < left[..., None]
+    return whole
@@ -0,0 +1,189 @@
+"""Scenario sweeps over availability and threshold shocks.
+
+A scenario is a set of shocks applied to the cleaned base frames before
+allocation. Keys are a column name (applies to every row) or a
+(column, name) pair (applies to one vehicle or deal):
+
+    grid = scenario_grid({
+        ("Uncalled Capital ($)", "Fund 2"): [1.0, 0.7],
+        "Opening Spread (bps)": [0, -25],
+    })
+    out = run_scenarios(deals, vdf, grid)
+
+Dollar and EBITDA columns are scaled by the shock value; Opening Spread is
+shifted by it in bps. Scenarios run in batches on a process pool; the base
+frames are handed to each worker once, at start-up.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import compute_availability
+from allocation.engine import allocate
+from allocation.schema import DOLLAR_COLS, FACILITIES
+
+# Column -> how a shock value is applied
+SHOCK_COLUMNS = {
+    "Cash ($)": "scale",
+    "Unfunded Commitments ($)": "scale",
+    "Uncalled Capital ($)": "scale",
+    "EBITDA ($mm)": "scale",
+    "Opening Spread (bps)": "shift",
+}
+VEHICLE_SHOCK_COLUMNS = {
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+}
+
+
+def _shock_column(key) -> str:
+    col = key[0] if isinstance(key, tuple) else key
+    if col not in SHOCK_COLUMNS:
+        raise ValueError(
+            f"cannot shock {col!r}; supported columns: {', '.join(SHOCK_COLUMNS)}"
+        )
+    return col
+
+
+def _shock_target(deals: pd.DataFrame, vdf: pd.DataFrame, key):
+    # Frame, name column and column a shock applies to. A (column, name) key
+    # must name a row of the frame the column belongs to: vehicles for the
+    # availability columns, deals otherwise.
+    col = _shock_column(key)
+    if col in VEHICLE_SHOCK_COLUMNS:
+        df, name_col, kind = vdf, "Vehicle", "vehicle"
+    else:
+        df, name_col, kind = deals, "Deal", "deal"
+    if not isinstance(key, tuple):
+        return df, slice(None), col
+    rows = (df[name_col] == key[1]).to_numpy()
+    if not rows.any():
+        raise ValueError(
+            f"cannot shock {col!r} of {key[1]!r}: {col!r} is a {kind} column "
+            f"and no {kind} is named {key[1]!r}"
+        )
+    return df, rows, col
+
+
+def _shock_label(key) -> str:
+    return f"{key[0]} [{key[1]}]" if isinstance(key, tuple) else key
+
+
+def scenario_grid(shocks: dict) -> list[dict]:
+    # Cartesian product of the shock values, one dict per scenario
+    keys = list(shocks)
+    for key in keys:
+        _shock_column(key)
+    return [dict(zip(keys, values)) for values in itertools.product(*shocks.values())]
+
+
+def apply_shocks(
+    deals: pd.DataFrame, vdf: pd.DataFrame, scenario: dict
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    deals, vdf = deals.copy(), vdf.copy()
+    for key, value in scenario.items():
+        df, rows, col = _shock_target(deals, vdf, key)
+        if SHOCK_COLUMNS[col] == "scale":
+            shocked = df.loc[rows, col] * value
+        else:
+            shocked = df.loc[rows, col] + value
+        if col in DOLLAR_COLS:
+            shocked = shocked.round().astype(np.int64)  # stay in whole cents
+        df.loc[rows, col] = shocked
+    return deals, compute_availability(vdf)
+
+
+def vehicle_totals(result) -> pd.DataFrame:
+    # Long format: allocation per (vehicle, facility) summed over all deals
+    totals = result.alloc.sum(axis=0)
+    n_vehicles, n_fac = totals.shape
+    return pd.DataFrame(
+        {
+            "Vehicle": np.repeat(np.asarray(result.vehicles, dtype=object), n_fac),
+            "Facility": np.tile(np.asarray(FACILITIES, dtype=object), n_vehicles),
+            "Allocation ($)": totals.ravel(),
+        }
+    )
+
+
+# =======================================
+# Worker side
+# =======================================
+
+_BASE = {}
+
+
+def _init_worker(deals: pd.DataFrame, vdf: pd.DataFrame, options: dict) -> None:
+    _BASE.update(deals=deals, vdf=vdf, options=options)
+
+
+def _run_scenario(sid: int, scenario: dict, by: str) -> pd.DataFrame:
+    deals, vdf = apply_shocks(_BASE["deals"], _BASE["vdf"], scenario)
+    result = allocate(deals, vdf, **_BASE["options"])
+    out = result.to_frame() if by == "deal" else vehicle_totals(result)
+    out.insert(0, "Scenario", sid)
+    for i, (key, value) in enumerate(scenario.items()):
+        out.insert(1 + i, _shock_label(key), value)
+    return out
+
+
+def _run_batch(batch: list, by: str) -> pd.DataFrame:
+    parts = [_run_scenario(sid, scenario, by) for sid, scenario in batch]
+    return pd.concat(parts, ignore_index=True)
+
+
+# =======================================
+# Runner
+# =======================================
+
+def run_scenarios(
+    deals: pd.DataFrame,
+    vdf: pd.DataFrame,
+    scenarios: list[dict],
+    *,
+    by: str = "vehicle",
+    workers: int | None = None,
+    **options,
+) -> pd.DataFrame:
+    """Allocate every scenario and return one tidy long-format frame.
+
+    ``deals`` / ``vdf`` are cleaned frames; ``options`` are passed to
+    allocate(). ``by="vehicle"`` returns totals per scenario, vehicle and
+    facility; ``by="deal"`` returns every non-zero deal allocation.
+    ``workers`` defaults to all cores; 1 runs in-process.
+    """
+    if by not in ("vehicle", "deal"):
+        raise ValueError(f"by must be 'vehicle' or 'deal', not {by!r}")
+    # Unknown targets fail here, before any worker starts
+    for key in {key for scenario in scenarios for key in scenario}:
+        _shock_target(deals, vdf, key)
+
+    numbered = list(enumerate(scenarios))
+    workers = min(workers or os.cpu_count() or 1, max(len(numbered), 1))
+
+    if workers <= 1:
+        _init_worker(deals, vdf, options)
+        return _run_batch(numbered, by) if numbered else pd.DataFrame()
+
+    # A few batches per worker keeps every core busy without paying the
+    # round-trip per scenario
+    n_batches = min(len(numbered), workers * 4)
+    batches = [numbered[i::n_batches] for i in range(n_batches)]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(deals, vdf, options),
+    ) as pool:
+        parts = list(pool.map(_run_batch, batches, itertools.repeat(by)))
+
+    return (
+        pd.concat(parts, ignore_index=True)
+        .sort_values("Scenario", kind="stable")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,106 @@
+"""Column layout of the deal book and vehicle table."""
+
+# =======================================
+# Deals
+# =======================================
+
+DEAL_NUM_COLS = [
+    "EBITDA ($mm)",
+    "Senior Net Leverage (x)",
+    "Total Leverage (x)",
+    "Opening Spread (bps)",
+    "IC Approved Hold ($)",
+    "Term Loan ($)",
+    "Revolver ($)",
+    "DDTL ($)",
+]
+
+DEAL_TEXT_COLS = [
+    "Deal",
+    "Est. Closing Date",
+    "New Deal or Amendment",
+    "Transaction Type",
+    "Covenant Lite",
+    "Internal Rating",
+    "S&P Rating",
+]
+
+# =======================================
+# Vehicles
+# =======================================
+
+VEHICLE_NUM_COLS = [
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+    "Target Hold ($)",
+    "Min EBITDA ($mm)",
+    "Min Spread (bps)",
+]
+
+VEHICLE_TOGGLE_COLS = ["Revolver On", "DDTL On"]
+
+VEHICLE_TEXT_COLS = ["Vehicle"]
+
+# Components summed by compute_availability
+AVAILABILITY_COLS = [
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+]
+
+# =======================================
+# Compact dtypes produced by cleaning
+# =======================================
+
+# Dollar amounts are held as int64 cents once cleaned
+CENTS = 100
+
+DOLLAR_COLS = {
+    "IC Approved Hold ($)",
+    "Term Loan ($)",
+    "Revolver ($)",
+    "DDTL ($)",
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+    "Target Hold ($)",
+    "Availability ($)",
+}
+
+# Low-cardinality text held as categoricals
+DEAL_CATEGORY_COLS = [
+    "New Deal or Amendment",
+    "Transaction Type",
+    "Covenant Lite",
+    "Internal Rating",
+    "S&P Rating",
+]
+
+
+def _dtype_kinds(num_cols, text_cols, toggle_cols=(), category_cols=()):
+    # Column -> "cents", "float32", "bool", "category" or "text"
+    kinds = {col: "cents" if col in DOLLAR_COLS else "float32" for col in num_cols}
+    kinds.update({col: "bool" for col in toggle_cols})
+    kinds.update(
+        {col: "category" if col in category_cols else "text" for col in text_cols}
+    )
+    return kinds
+
+
+DEAL_DTYPES = _dtype_kinds(
+    DEAL_NUM_COLS, DEAL_TEXT_COLS, category_cols=DEAL_CATEGORY_COLS
+)
+VEHICLE_DTYPES = _dtype_kinds(
+    VEHICLE_NUM_COLS, VEHICLE_TEXT_COLS, toggle_cols=VEHICLE_TOGGLE_COLS
+)
+
+# =======================================
+# Facilities
+# =======================================
+
+FACILITIES = ["Term Loan", "Revolver", "DDTL"]
+FACILITY_SIZE_COLS = ["Term Loan ($)", "Revolver ($)", "DDTL ($)"]
+
+# Vehicle toggle gating each facility (Term Loan is always on)
+FACILITY_TOGGLE_COLS = [None, "Revolver On", "DDTL On"]
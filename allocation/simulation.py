@@ -0,0 +1,169 @@
+"""Monte Carlo simulation of allocations under closing and funding risk.
+
+Each draw perturbs the book three ways:
+
+- closing dates slip by an exponential number of days (this changes the
+  processing order in sequential mode),
+- part of every vehicle's availability is called elsewhere (a beta-
+  distributed drawdown fraction),
+- some deals are upsized by an amendment add-on.
+
+All draws are allocated together as arrays with a leading draw axis, so
+the cost grows with the number of deal chunks (or deals, in sequential
+mode) rather than with the number of draws.
+"""
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import float_column
+from allocation.eligibility import CHUNK_PAIRS, ThresholdIndex
+from allocation.engine import (
+    _sequential_split,
+    _split,
+    ic_hold_split,
+    tranche_sizes,
+)
+from allocation.schema import FACILITIES
+
+# Beta concentration of the availability drawdown draws
+DRAWDOWN_CONCENTRATION = 10.0
+
+
+@dataclass
+class SimulationResult:
+    vehicles: list
+    # (draw, vehicle) allocation summed across the book
+    totals: np.ndarray
+    # (draw, vehicle) largest single-deal allocation as % of Target Hold,
+    # NaN where Target Hold is 0
+    peak_pct_target: np.ndarray
+
+    def summary(self, percentiles=(5, 25, 50, 75, 95)) -> pd.DataFrame:
+        # One row per vehicle, one column per metric and percentile
+        out = {"Vehicle": self.vehicles}
+        for label, values in (
+            ("Allocation ($)", self.totals),
+            ("Peak % of Target Hold", self.peak_pct_target),
+        ):
+            # Vehicles without a Target Hold are all-NaN
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                q = np.nanpercentile(values, percentiles, axis=0)
+            for p, row in zip(percentiles, q):
+                out[f"{label} P{p}"] = row
+        return pd.DataFrame(out)
+
+
+def _closing_days(deals: pd.DataFrame) -> np.ndarray:
+    # Days since epoch; missing or bad dates sort last
+    if "Est. Closing Date" not in deals.columns:
+        return np.arange(len(deals), dtype=float)
+    dates = pd.to_datetime(
+        deals["Est. Closing Date"], errors="coerce", format="mixed"
+    )
+    days = dates.to_numpy(dtype="datetime64[D]").astype(float)
+    days[dates.isna().to_numpy()] = np.inf
+    return days
+
+
+def simulate(
+    deals: pd.DataFrame,
+    vdf: pd.DataFrame,
+    n_draws: int = 1000,
+    *,
+    seed: int = 0,
+    slip_days: float = 14.0,
+    drawdown: float = 0.1,
+    amend_prob: float = 0.1,
+    amend_size: float = 0.25,
+    sequential: bool = False,
+    cap_target: bool = False,
+    ic_hold: bool = False,
+    lot_size: float | None = None,
+) -> SimulationResult:
+    """Allocate ``n_draws`` seeded perturbations of the book at once.
+
+    ``slip_days`` is the mean closing-date slip, ``drawdown`` the mean
+    fraction of availability called elsewhere, and ``amend_prob`` the
+    chance a deal is upsized by up to ``amend_size`` of its tranches. The
+    allocation options are those of allocate().
+    """
+    if not isinstance(n_draws, (int, np.integer)) or n_draws < 1:
+        raise ValueError(f"n_draws must be a positive integer, not {n_draws!r}")
+    if not 0.0 <= drawdown < 1.0:
+        raise ValueError(f"drawdown must be in [0, 1), not {drawdown!r}")
+    if not 0.0 <= amend_prob <= 1.0:
+        raise ValueError(f"amend_prob must be in [0, 1], not {amend_prob!r}")
+    if amend_size < 0:
+        raise ValueError(f"amend_size must be non-negative, not {amend_size!r}")
+    if slip_days < 0:
+        raise ValueError(f"slip_days must be non-negative, not {slip_days!r}")
+
+    rng = np.random.default_rng(seed)
+    n_deals, n_vehicles, n_fac = len(deals), len(vdf), len(FACILITIES)
+
+    base_avail = np.maximum(float_column(vdf, "Availability ($)"), 0.0)
+    if drawdown > 0:
+        a = drawdown * DRAWDOWN_CONCENTRATION
+        b = (1.0 - drawdown) * DRAWDOWN_CONCENTRATION
+        called = rng.beta(a, b, (n_draws, n_vehicles))
+    else:
+        called = np.zeros((n_draws, n_vehicles))
+    avail = base_avail * (1.0 - called)  # (draw, vehicle)
+
+    amended = rng.random((n_draws, n_deals)) < amend_prob
+    upsize = 1.0 + amended * rng.uniform(0.0, amend_size, (n_draws, n_deals))
+    sizes = tranche_sizes(deals) * upsize[..., None]  # (draw, deal, facility)
+    amounts = ic_hold_split(deals, sizes) if ic_hold else sizes
+
+    targets = float_column(vdf, "Target Hold ($)")
+    cap = targets if cap_target else None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_target = np.where(targets > 0, 100.0 / targets, np.nan)
+
+    # Thresholds do not move, and drawdown never makes a vehicle available,
+    # so base eligibility holds for every draw
+    eligible = ThresholdIndex.build(vdf).bitmap(deals)
+
+    totals = np.zeros((n_draws, n_vehicles))
+    peak = np.zeros((n_draws, n_vehicles))
+
+    if sequential:
+        slip = np.zeros((n_draws, n_deals))
+        if slip_days > 0:
+            slip = rng.exponential(slip_days, (n_draws, n_deals))
+        order = np.argsort(_closing_days(deals) + slip, axis=1, kind="stable")
+        remaining = avail
+        draws = np.arange(n_draws)
+        for k in range(n_deals):
+            d = order[:, k]
+            elig = eligible.dense(d) & (remaining > 0)[..., None]
+            weights = np.where(elig, remaining[..., None], 0.0)
+            held = _sequential_split(
+                weights, amounts[draws, d], remaining, cap, lot_size
+            ).sum(axis=-1)
+            remaining = np.maximum(remaining - held, 0.0)
+            totals += held
+            np.maximum(peak, held, out=peak)
+    else:
+        # Closing order does not affect independent deals, so slippage is
+        # not drawn; deals are chunked so each dense block stays bounded
+        step = max(1, CHUNK_PAIRS // max(1, n_draws * n_vehicles * n_fac))
+        for start in range(0, n_deals, step):
+            rows = slice(start, start + step)
+            elig = eligible.dense(rows)  # (deal, vehicle, facility)
+            weights = np.where(elig, avail[:, None, :, None], 0.0)
+            alloc = _split(weights, amounts[:, rows], cap, lot_size)
+            held = alloc.sum(axis=-1)  # (draw, deal, vehicle)
+            totals += held.sum(axis=1)
+            np.maximum(peak, held.max(axis=1, initial=0.0), out=peak)
+
+    return SimulationResult(
+        vehicles=vdf["Vehicle"].tolist(),
+        totals=totals,
+        peak_pct_target=peak * inv_target,
+    )
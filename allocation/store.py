@@ -0,0 +1,270 @@
+"""Local SQLite store for deal books, vehicle tables and allocation runs.
+
+Books are cleaned frames, saved row-per-row into fixed-schema tables with
+one bulk insert per save and loaded back in the same compact dtypes (dollar
+amounts as integer cents). Allocation runs are saved in long format (one row
+per non-zero deal / facility / vehicle amount) and indexed by run, deal and
+vehicle so past results can be queried without recomputing.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from allocation.schema import DEAL_DTYPES, VEHICLE_DTYPES
+
+# Column -> cleaned dtype kind for each kind of book
+BOOK_COLUMNS = {"deals": DEAL_DTYPES, "vehicles": VEHICLE_DTYPES}
+
+SQL_TYPES = {
+    "cents": "INTEGER",
+    "float32": "REAL",
+    "bool": "INTEGER",
+    "category": "TEXT",
+    "text": "TEXT",
+}
+
+# Dtype kind -> restore a loaded column
+RESTORE = {
+    "cents": lambda s: s.fillna(0).astype("int64"),
+    "float32": lambda s: s.astype("float32"),
+    "bool": lambda s: s.fillna(0).astype(bool),
+    "category": lambda s: s.astype("category"),
+    "text": lambda s: s,
+}
+
+RESULT_COLUMNS = ["Deal #", "Deal", "Facility", "Vehicle", "Allocation ($)"]
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _rows(df: pd.DataFrame, columns: list):
+    # Python scalars for sqlite3; NaN is stored as NULL
+    values = df[columns].astype(object)
+    return values.where(df[columns].notna(), None).itertuples(index=False, name=None)
+
+
+def _schema() -> str:
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS books (
+            book_id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            columns TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS books_name ON books (kind, name)",
+        """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY,
+            deal_book INTEGER REFERENCES books (book_id),
+            vehicle_book INTEGER REFERENCES books (book_id),
+            options TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS allocations (
+            run_id INTEGER NOT NULL REFERENCES runs (run_id),
+            deal_no INTEGER NOT NULL,
+            deal TEXT,
+            facility TEXT NOT NULL,
+            vehicle TEXT NOT NULL,
+            amount REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS allocations_deal ON allocations (run_id, deal)",
+        "CREATE INDEX IF NOT EXISTS allocations_vehicle "
+        "ON allocations (run_id, vehicle)",
+    ]
+    for kind, columns in BOOK_COLUMNS.items():
+        cols = ", ".join(f"{_q(c)} {SQL_TYPES[k]}" for c, k in columns.items())
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {kind} ("
+            "book_id INTEGER NOT NULL REFERENCES books (book_id), "
+            f"row INTEGER NOT NULL, {cols}, PRIMARY KEY (book_id, row))"
+        )
+    return ";\n".join(statements) + ";"
+
+
+class AllocationStore:
+    """Deal books, vehicle tables and allocation runs in one SQLite file.
+
+    ``path`` defaults to an in-memory database. One connection is shared
+    by every thread (streamlit sessions included), so each statement and
+    transaction holds a lock: otherwise one session's commit or rollback
+    could cover another session's half-written inserts.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            self.con.execute("PRAGMA journal_mode=WAL")
+            self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.executescript(_schema())
+
+    def close(self) -> None:
+        with self._lock:
+            self.con.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock, self.con:
+            yield self.con
+
+    def _fetchall(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self.con.execute(sql, params).fetchall()
+
+    def _read_sql(self, sql: str, params=()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self.con, params=params)
+
+    # =======================================
+    # Books
+    # =======================================
+
+    def _save_book(self, kind: str, df: pd.DataFrame, name: str) -> int:
+        columns = [c for c in df.columns if c in BOOK_COLUMNS[kind]]
+        frame = df.reset_index(drop=True)
+        frame.insert(0, "row", frame.index)
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        names = ", ".join(_q(c) for c in columns)
+
+        with self._transaction():
+            cur = self.con.execute(
+                "INSERT INTO books (kind, name, columns, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (kind, name, json.dumps(columns), _now()),
+            )
+            book_id = cur.lastrowid
+            self.con.executemany(
+                f"INSERT INTO {kind} (book_id, row, {names}) "
+                f"VALUES ({placeholders})",
+                ((book_id, *row) for row in _rows(frame, ["row"] + columns)),
+            )
+        return book_id
+
+    def _book_id(self, kind: str, book) -> int:
+        # An id, or a name meaning the latest book saved under it
+        if isinstance(book, int):
+            return book
+        rows = self._fetchall(
+            "SELECT book_id FROM books WHERE kind = ? AND name = ? "
+            "ORDER BY book_id DESC LIMIT 1",
+            (kind, book),
+        )
+        if not rows:
+            raise KeyError(f"no saved {kind} book named {book!r}")
+        return rows[0][0]
+
+    def _load_book(self, kind: str, book) -> pd.DataFrame:
+        book_id = self._book_id(kind, book)
+        rows = self._fetchall(
+            "SELECT columns FROM books WHERE book_id = ? AND kind = ?",
+            (book_id, kind),
+        )
+        if not rows:
+            raise KeyError(f"no saved {kind} book with id {book_id}")
+        columns = json.loads(rows[0][0])
+
+        records = self._fetchall(
+            f"SELECT {', '.join(_q(c) for c in columns)} FROM {kind} "
+            "WHERE book_id = ? ORDER BY row",
+            (book_id,),
+        )
+        df = pd.DataFrame.from_records(records, columns=columns)
+        return pd.DataFrame(
+            {col: RESTORE[BOOK_COLUMNS[kind][col]](df[col]) for col in columns}
+        )
+
+    def save_deals(self, df: pd.DataFrame, name: str) -> int:
+        return self._save_book("deals", df, name)
+
+    def save_vehicles(self, df: pd.DataFrame, name: str) -> int:
+        return self._save_book("vehicles", df, name)
+
+    def load_deals(self, book) -> pd.DataFrame:
+        return self._load_book("deals", book)
+
+    def load_vehicles(self, book) -> pd.DataFrame:
+        return self._load_book("vehicles", book)
+
+    def books(self, kind: str | None = None) -> pd.DataFrame:
+        sql = "SELECT book_id, kind, name, created_at FROM books"
+        params = ()
+        if kind is not None:
+            sql += " WHERE kind = ?"
+            params = (kind,)
+        return self._read_sql(sql + " ORDER BY book_id", params)
+
+    # =======================================
+    # Runs
+    # =======================================
+
+    def save_run(
+        self,
+        result,
+        *,
+        deal_book: int | None = None,
+        vehicle_book: int | None = None,
+        options: dict | None = None,
+    ) -> int:
+        long = result.to_frame()
+        with self._transaction():
+            cur = self.con.execute(
+                "INSERT INTO runs (deal_book, vehicle_book, options, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (deal_book, vehicle_book, json.dumps(options or {}), _now()),
+            )
+            run_id = cur.lastrowid
+            self.con.executemany(
+                "INSERT INTO allocations "
+                "(run_id, deal_no, deal, facility, vehicle, amount) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, *row) for row in _rows(long, RESULT_COLUMNS)),
+            )
+        return run_id
+
+    def load_run(
+        self, run_id: int, *, deal: str | None = None, vehicle: str | None = None
+    ) -> pd.DataFrame:
+        # Long-format allocations of a saved run, optionally one deal/vehicle
+        sql = (
+            "SELECT deal_no, deal, facility, vehicle, amount FROM allocations "
+            "WHERE run_id = ?"
+        )
+        params = [run_id]
+        if deal is not None:
+            sql += " AND deal = ?"
+            params.append(deal)
+        if vehicle is not None:
+            sql += " AND vehicle = ?"
+            params.append(vehicle)
+        records = self._fetchall(sql + " ORDER BY rowid", params)
+        return pd.DataFrame.from_records(records, columns=RESULT_COLUMNS)
+
+    def runs(self) -> pd.DataFrame:
+        return self._read_sql(
+            """
+            SELECT r.run_id, r.deal_book, r.vehicle_book, r.options,
+                   r.created_at,
+                   COUNT(a.run_id) AS allocations,
+                   COALESCE(SUM(a.amount), 0) AS total
+            FROM runs r LEFT JOIN allocations a ON a.run_id = r.run_id
+            GROUP BY r.run_id ORDER BY r.run_id
+            """
+        )
@@ -0,0 +1,90 @@
+"""Seeded synthetic deal books and vehicle tables with the same columns as
+allocation.defaults, for benchmarks and load testing."""
+
+import numpy as np
+import pandas as pd
+
+TRANSACTION_TYPES = ["LBO", "Div Recap", "Refinancing", "Add-on Acquisition"]
+INTERNAL_RATINGS = [
+    "1 (Low Risk)",
+    "2 (Lower Risk)",
+    "3 (Mid Risk)",
+    "4 (Higher Risk)",
+    "5 (High Risk)",
+]
+SP_RATINGS = ["BB", "BB-", "B+", "B", "B-", "CCC+"]
+
+
+def synthetic_deals(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    closing = pd.Timestamp("2025-12-01") + pd.to_timedelta(
+        rng.integers(0, 180, n), unit="D"
+    )
+    ebitda = np.round(rng.lognormal(np.log(50.0), 0.6, n), 1)
+    senior = np.round(rng.uniform(2.5, 5.0, n), 2)
+
+    # Tranche sizes in whole $mm; about a third of deals have no DDTL and a
+    # tenth have no revolver
+    term_loan = rng.integers(25, 500, n) * 1_000_000
+    def share_of(base, low, high):
+        return np.round(base * rng.uniform(low, high, n), -6).astype(np.int64)
+
+    revolver = np.where(rng.random(n) < 0.9, share_of(term_loan, 0.1, 0.2), 0)
+    ddtl = np.where(rng.random(n) < 0.65, share_of(term_loan, 0.05, 0.15), 0)
+    ic_hold = share_of(term_loan + revolver + ddtl, 0.1, 0.35)
+
+    return pd.DataFrame(
+        {
+            "Deal": [f"Deal {i + 1:05d}" for i in range(n)],
+            "Est. Closing Date": closing.strftime("%Y-%m-%d"),
+            "New Deal or Amendment": rng.choice(
+                ["New Deal", "Amendment"], n, p=[0.7, 0.3]
+            ),
+            "Transaction Type": rng.choice(TRANSACTION_TYPES, n),
+            "EBITDA ($mm)": ebitda,
+            "Senior Net Leverage (x)": senior,
+            "Total Leverage (x)": np.round(senior + rng.uniform(0.0, 1.5, n), 2),
+            "Opening Spread (bps)": rng.integers(12, 29, n) * 25,
+            "Covenant Lite": rng.choice(["Yes", "No"], n),
+            "Internal Rating": rng.choice(INTERNAL_RATINGS, n),
+            "S&P Rating": rng.choice(SP_RATINGS, n),
+            "IC Approved Hold ($)": ic_hold,
+            "Term Loan ($)": term_loan,
+            "Revolver ($)": revolver,
+            "DDTL ($)": ddtl,
+        }
+    )
+
+
+def synthetic_vehicles(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+
+    def dollars(low, high):
+        return rng.integers(low, high, n) * 1_000_000
+
+    cash = dollars(0, 25)
+    unfunded = dollars(0, 50)
+    uncalled = dollars(0, 100)
+
+    # Roughly one vehicle in ten is fully drawn (zero availability)
+    drawn = rng.random(n) < 0.1
+    cash, unfunded, uncalled = (
+        np.where(drawn, 0, x) for x in (cash, unfunded, uncalled)
+    )
+
+    names = [f"Fund {i + 1}" if i < 10 else f"SMA {i - 9}" for i in range(n)]
+
+    return pd.DataFrame(
+        {
+            "Vehicle": names,
+            "Cash ($)": cash,
+            "Unfunded Commitments ($)": unfunded,
+            "Uncalled Capital ($)": uncalled,
+            "Target Hold ($)": dollars(0, 60),
+            "Min EBITDA ($mm)": rng.choice([0.0, 0.0, 25.0, 50.0, 75.0], n),
+            "Min Spread (bps)": rng.choice([0.0, 0.0, 350.0, 400.0, 450.0], n),
+            "Revolver On": rng.random(n) < 0.7,
+            "DDTL On": rng.random(n) < 0.5,
+        }
+    )
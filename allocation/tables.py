@@ -0,0 +1,235 @@
+"""Display tables rendered by the UI, built from cleaned frames and an
+AllocationResult. Pure pandas so they can be produced without streamlit.
+
+Amounts and percentages stay numeric; formatting.column_formats gives the
+display format of each column."""
+
+import numpy as np
+import pandas as pd
+
+from allocation.cleaning import float_column
+from allocation.engine import AllocationResult
+from allocation.schema import CENTS, FACILITIES
+
+AVAILABILITY_DISPLAY_COLS = [
+    "Vehicle",
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+    "Availability ($)",
+    "Target Hold ($)",
+    "Min EBITDA ($mm)",
+    "Min Spread (bps)",
+    "Revolver On",
+    "DDTL On",
+]
+
+AVAILABILITY_DOLLAR_COLS = [
+    "Cash ($)",
+    "Unfunded Commitments ($)",
+    "Uncalled Capital ($)",
+    "Availability ($)",
+    "Target Hold ($)",
+]
+
+
+# =======================================
+# Vehicle availability summary
+# =======================================
+
+def availability_table(vdf: pd.DataFrame) -> pd.DataFrame:
+    avail_display = vdf[AVAILABILITY_DISPLAY_COLS].copy()
+    for col in AVAILABILITY_DOLLAR_COLS:
+        avail_display[col] = float_column(vdf, col)
+    return avail_display
+
+
+def running_balance_table(
+    result: AllocationResult, deals: pd.DataFrame, positions=None
+) -> pd.DataFrame:
+    # Sequential mode: availability left in each vehicle after each deal,
+    # in the order the deals were processed. With ``positions`` only those
+    # deals are listed, followed by the balance left after every deal.
+    order = result.order
+    shown = order if positions is None else order[np.isin(order, positions)]
+
+    labels = {"Deal": np.asarray(result.deals, dtype=object)[shown]}
+    if "Est. Closing Date" in deals.columns:
+        labels["Est. Closing Date"] = deals["Est. Closing Date"].to_numpy()[shown]
+    balance = pd.DataFrame(result.balance[shown], columns=result.vehicles)
+    table = pd.concat([pd.DataFrame(labels), balance], axis=1)
+    if positions is None or not len(order):
+        return table
+
+    final = pd.DataFrame(result.balance[order[-1:]], columns=result.vehicles)
+    final.insert(0, "Deal", "Final balance")
+    if "Est. Closing Date" in deals.columns:
+        final.insert(1, "Est. Closing Date", "")
+    return pd.concat([table, final], ignore_index=True)
+
+
+# =======================================
+# Per-deal tables
+# =======================================
+
+def deal_name(idx, row: pd.Series):
+    return row.get("Deal", f"Deal {idx+1}") or f"Deal {idx+1}"
+
+
+def is_blank_deal(name, row: pd.Series) -> bool:
+    # Empty rows (no name, no tranche sizes) are skipped in the results
+    return (
+        (str(name).strip() == "")
+        and row.get("Term Loan ($)", 0) == 0
+        and row.get("Revolver ($)", 0) == 0
+        and row.get("DDTL ($)", 0) == 0
+    )
+
+
+def deal_summary_table(name, row: pd.Series) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "Deal": name,
+                "Est. Closing Date": row.get("Est. Closing Date", ""),
+                "New Deal or Amendment": row.get("New Deal or Amendment", ""),
+                "Transaction Type": row.get("Transaction Type", ""),
+                "EBITDA ($mm)": float(row.get("EBITDA ($mm)", 0.0) or 0.0),
+                "Senior Net Leverage (x)": float(
+                    row.get("Senior Net Leverage (x)", 0.0) or 0.0
+                ),
+                "Total Leverage (x)": float(row.get("Total Leverage (x)", 0.0) or 0.0),
+                "Opening Spread (bps)": float(
+                    row.get("Opening Spread (bps)", 0.0) or 0.0
+                ),
+                "Covenant Lite": row.get("Covenant Lite", ""),
+                "Internal Rating": row.get("Internal Rating", ""),
+                "S&P Rating": row.get("S&P Rating", ""),
+                "IC Approved Hold ($)": row.get("IC Approved Hold ($)", 0) / CENTS,
+            }
+        ]
+    )
+
+
+def allocation_table(result: AllocationResult, pos: int) -> pd.DataFrame:
+    # Facilities down the rows, vehicles across the columns, plus a totals row
+    alloc = result.alloc[pos]
+
+    # One 2-D block, not a column per vehicle
+    cells = np.vstack([alloc.T, alloc.sum(axis=1)])
+    return pd.DataFrame(
+        cells,
+        index=pd.Index(FACILITIES + ["Total"], name="Facility"),
+        columns=result.vehicles,
+    )
+
+
+def consistency_table(result: AllocationResult, pos: int) -> pd.DataFrame:
+    # With IC hold enforced, allocations are checked against the approved
+    # hold and the rest of each tranche is shown as unallocated
+    def with_total(x):
+        return np.append(x, x.sum())
+
+    sizes = with_total(result.sizes[pos])
+    sums = with_total(result.alloc[pos].sum(axis=0))
+
+    table = pd.DataFrame(
+        {"Tranche": FACILITIES + ["TOTAL DEAL"], "Tranche Size ($)": sizes}
+    )
+    if result.hold is None and result.balance is not None:
+        # Sequential mode: vehicles can run out, and the shortfall is
+        # reported instead of a difference
+        table["Sum of Allocations ($)"] = sums
+        table["Unallocated ($)"] = sizes - sums
+    elif result.hold is None:
+        table["Sum of Allocations ($)"] = sums
+        table["Difference ($)"] = sums - sizes
+    else:
+        holds = with_total(result.hold[pos])
+        table["Approved Hold ($)"] = holds
+        table["Sum of Allocations ($)"] = sums
+        table["Difference ($)"] = sums - holds
+        table["Unallocated ($)"] = sizes - sums
+    return table
+
+
+def pro_rata_table(
+    result: AllocationResult, pos: int, vdf: pd.DataFrame
+) -> pd.DataFrame:
+    allocated = result.alloc[pos].sum(axis=1)
+    targets = float_column(vdf, "Target Hold ($)")
+    deal_total = float(result.sizes[pos].sum())
+
+    # Undefined shares (no deal size, no target) are left blank
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = allocated / deal_total * 100.0 if deal_total > 0 else np.nan
+        of_target = np.where(targets > 0, allocated / targets * 100.0, np.nan)
+
+    return pd.DataFrame(
+        {
+            "Vehicle": result.vehicles,
+            "Allocated ($)": allocated,
+            "Target Hold ($)": targets,
+            "Pro-Rata Share of Deal (%)": share,
+            "% of Target Hold (This Deal)": of_target,
+        }
+    )
+
+
+def page_totals_table(result: AllocationResult, positions) -> pd.DataFrame:
+    # Allocations summed over a page of deals: facilities down the rows,
+    # vehicles across, then the allocated total and the tranche sizes
+    alloc = result.alloc[positions].sum(axis=0)
+    sizes = result.sizes[positions].sum(axis=0)
+
+    cells = np.vstack([alloc.T, alloc.sum(axis=1)])
+    table = pd.DataFrame(
+        cells,
+        index=pd.Index(FACILITIES + ["Total"], name="Facility"),
+        columns=result.vehicles,
+    )
+    table["Allocated ($)"] = cells.sum(axis=1)
+    table["Tranche Size ($)"] = np.append(sizes, sizes.sum())
+    return table
+
+
+# =======================================
+# Compact (whole book) table
+# =======================================
+
+def compact_table(
+    result: AllocationResult,
+    vdf: pd.DataFrame,
+    first_deal: int = 0,
+    max_rows: int | None = None,
+) -> pd.DataFrame:
+    # Long format over the whole book, one row per non-zero (deal, facility,
+    # vehicle) amount; numeric columns stay numeric. ``first_deal`` is the
+    # book position of the result's first deal when it covers a slice;
+    # ``max_rows`` keeps only the first rows, built from just the leading
+    # deals that hold them
+    alloc = result.alloc
+    if max_rows is not None:
+        per_deal = np.count_nonzero(alloc, axis=(1, 2))
+        alloc = alloc[: np.searchsorted(np.cumsum(per_deal), max_rows) + 1]
+    d, f, v = np.nonzero(alloc.transpose(0, 2, 1))
+    d, f, v = d[:max_rows], f[:max_rows], v[:max_rows]
+    amount = alloc[d, v, f]
+    deal_total = result.sizes.sum(axis=1)[d]
+    targets = float_column(vdf, "Target Hold ($)")[v]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_deal = np.where(deal_total > 0, amount / deal_total * 100.0, np.nan)
+        pct_target = np.where(targets > 0, amount / targets * 100.0, np.nan)
+
+    return pd.DataFrame(
+        {
+            "Deal #": first_deal + d + 1,
+            "Deal": np.asarray(result.deals, dtype=object)[d],
+            "Facility": np.asarray(FACILITIES, dtype=object)[f],
+            "Vehicle": np.asarray(result.vehicles, dtype=object)[v],
+            "Allocation ($)": amount,
+            "% of Deal": pct_deal,
+            "% of Target Hold": pct_target,
+        }
+    )
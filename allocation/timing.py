@@ -0,0 +1,113 @@
+"""Wall-time instrumentation of pipeline stages and per-deal rendering.
+
+A Timings object collects one record per timed block: the stage name, the
+deal it belongs to (if any), wall seconds, optional row / allocation counts
+and how deeply it is nested in other timed blocks. Records are kept in
+start order and export as frames or JSON.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+import pandas as pd
+
+RECORD_COLUMNS = ["Stage", "Deal", "Seconds", "Rows", "Allocations"]
+
+
+def _sum_or_na(s: pd.Series):
+    return s.sum(min_count=1)
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    deal: str | None = None
+    seconds: float = 0.0
+    rows: int | None = None
+    allocations: int | None = None
+    depth: int = 0  # number of enclosing stages
+
+
+@dataclass
+class Timings:
+    records: list = field(default_factory=list)
+    started_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(
+            timespec="seconds"
+        )
+    )
+    _depth: int = field(default=0, init=False, repr=False)
+
+    @contextmanager
+    def stage(
+        self,
+        stage: str,
+        *,
+        deal: str | None = None,
+        rows: int | None = None,
+        allocations: int | None = None,
+    ):
+        # Yields the record so counts known only at the end can be filled in
+        record = StageTiming(
+            stage, deal, rows=rows, allocations=allocations, depth=self._depth
+        )
+        self.records.append(record)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            self._depth -= 1
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                [r.stage, r.deal, r.seconds, r.rows, r.allocations]
+                for r in self.records
+            ],
+            columns=RECORD_COLUMNS,
+        ).astype({"Rows": "Int64", "Allocations": "Int64"})
+
+    def stage_totals(self) -> pd.DataFrame:
+        # One row per stage, summed over deals, in first-seen order; counts
+        # no record of a stage filled in stay blank
+        df = self.to_frame()
+        totals = df.groupby("Stage", sort=False).agg(
+            Calls=("Seconds", "size"),
+            Seconds=("Seconds", "sum"),
+            Rows=("Rows", _sum_or_na),
+            Allocations=("Allocations", _sum_or_na),
+        )
+        return totals.reset_index()
+
+    def deal_totals(self) -> pd.DataFrame:
+        # Deals down the rows, seconds per stage across, slowest deals first
+        df = self.to_frame().dropna(subset=["Deal"])
+        if df.empty:
+            return pd.DataFrame(columns=["Deal", "Total (s)"])
+        seconds = df.pivot_table(
+            index="Deal", columns="Stage", values="Seconds", aggfunc="sum", sort=False
+        )
+        counts = df.groupby("Deal", sort=False)[["Rows", "Allocations"]].agg(
+            _sum_or_na
+        )
+        out = seconds.assign(**{"Total (s)": seconds.sum(axis=1)}).join(counts)
+        return out.sort_values("Total (s)", ascending=False).reset_index()
+
+    def total_seconds(self) -> float:
+        # Top-level stages only; nested ones are already inside their parent
+        return float(sum(r.seconds for r in self.records if r.depth == 0))
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "started_at": self.started_at,
+                "total_seconds": self.total_seconds(),
+                "records": [asdict(r) for r in self.records],
+            },
+            indent=2,
+        )
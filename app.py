@@ -1,6 +1,38 @@
-import math
+import io
+import os
+
+import numpy as np
 import streamlit as st
-import pandas as pd
+
+from allocation import (
+    allocate_incremental,
+    clean_deals,
+    clean_vehicles,
+    compute_availability,
+    default_deals,
+    default_vehicles,
+    fmt_dollars,
+)
+from allocation.arrow_io import read_deals, read_vehicles, write_frame
+from allocation.cache import CacheStats, frame_fingerprint
+from allocation.cleaning import to_dollars
+from allocation.formatting import DOLLAR_FORMAT, column_formats
+from allocation.jobs import AllocationJob
+from allocation.rounding import LOT_SIZES
+from allocation.store import AllocationStore
+from allocation.tables import (
+    allocation_table,
+    availability_table,
+    compact_table,
+    consistency_table,
+    deal_name,
+    deal_summary_table,
+    is_blank_deal,
+    page_totals_table,
+    pro_rata_table,
+    running_balance_table,
+)
+from allocation.timing import Timings
 
 st.set_page_config(
     page_title="Multi-Deal Availability Allocation Tool",
@@ -20,99 +52,22 @@ st.caption(
     "Vehicles can also be filtered by Min EBITDA and Min Spread thresholds."
 )
 
-# =======================================
-# DEFAULT DATA
-# =======================================
-
-default_deals = pd.DataFrame(
-    [
-        {
-            "Deal": "ABC Deal",
-            "Est. Closing Date": "2025-12-05",
-            "New Deal or Amendment": "New Deal",
-            "Transaction Type": "Div Recap",
-            "EBITDA ($mm)": 50.0,
-            "Senior Net Leverage (x)": 3.0,
-            "Total Leverage (x)": 4.0,
-            "Opening Spread (bps)": 400,
-            "Covenant Lite": "Yes",
-            "Internal Rating": "3 (Mid Risk)",
-            "S&P Rating": "B+",
-            "IC Approved Hold ($)": 50_000_000,
-            "Term Loan ($)": 150_000_000,
-            "Revolver ($)": 25_000_000,
-            "DDTL ($)": 5_000_000,
-        },
-        {
-            "Deal": "XXZ Deal",
-            "Est. Closing Date": "2025-12-10",
-            "New Deal or Amendment": "Amendment",
-            "Transaction Type": "LBO",
-            "EBITDA ($mm)": 70.0,
-            "Senior Net Leverage (x)": 3.5,
-            "Total Leverage (x)": 5.0,
-            "Opening Spread (bps)": 425,
-            "Covenant Lite": "No",
-            "Internal Rating": "4 (Higher Risk)",
-            "S&P Rating": "B",
-            "IC Approved Hold ($)": 75_000_000,
-            "Term Loan ($)": 250_000_000,
-            "Revolver ($)": 50_000_000,
-            "DDTL ($)": 15_000_000,
-        },
-    ]
-)
-
-default_vehicles = pd.DataFrame(
-    [
-        {
-            "Vehicle": "Fund 1",
-            "Cash ($)": 5_000_000,
-            "Unfunded Commitments ($)": 5_000_000,
-            "Uncalled Capital ($)": 10_000_000,
-            "Target Hold ($)": 40_000_000,
-            "Min EBITDA ($mm)": 0.0,
-            "Min Spread (bps)": 0.0,
-            "Revolver On": True,
-            "DDTL On": True,
-        },
-        {
-            "Vehicle": "Fund 2",
-            "Cash ($)": 5_000_000,
-            "Unfunded Commitments ($)": 5_000_000,
-            "Uncalled Capital ($)": 10_000_000,
-            "Target Hold ($)": 30_000_000,
-            "Min EBITDA ($mm)": 60.0,
-            "Min Spread (bps)": 400.0,
-            "Revolver On": True,
-            "DDTL On": False,
-        },
-        {
-            "Vehicle": "Fund 3",
-            "Cash ($)": 5_000_000,
-            "Unfunded Commitments ($)": 5_000_000,
-            "Uncalled Capital ($)": 10_000_000,
-            "Target Hold ($)": 20_000_000,
-            "Min EBITDA ($mm)": 0.0,
-            "Min Spread (bps)": 425.0,
-            "Revolver On": False,
-            "DDTL On": True,
-        },
-    ]
-)
-
 # =======================================
 # LAYOUT: Deals (left) + Vehicles (right)
 # =======================================
 
+# Loading a saved book swaps the editors' base frames; a new key discards
+# the edits made on top of the previous ones
+book_version = st.session_state.get("book_version", 0)
+
 left_col, right_col = st.columns([2.5, 1.5])
 
 with left_col:
     st.subheader("Deals")
 
     deals_df = st.data_editor(
-        default_deals,
-        key="deals_editor",
+        st.session_state.get("deals_base", default_deals),
+        key=f"deals_editor_{book_version}",
         num_rows="dynamic",
         use_container_width=True,
         hide_index=True,
@@ -155,8 +110,8 @@ with right_col:
     st.subheader("Vehicles / Funds")
 
     vehicles_df = st.data_editor(
-        default_vehicles,
-        key="vehicles_editor",
+        st.session_state.get("vehicles_base", default_vehicles),
+        key=f"vehicles_editor_{book_version}",
         num_rows="dynamic",
         use_container_width=True,
         hide_index=True,
@@ -187,369 +142,554 @@ with right_col:
 st.markdown("---")
 
 # =======================================
-# Cleaning / helpers
+# Cached pipeline stages
 # =======================================
 
-def clean_deals(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-
-    num_cols = [
-        "EBITDA ($mm)",
-        "Senior Net Leverage (x)",
-        "Total Leverage (x)",
-        "Opening Spread (bps)",
-        "IC Approved Hold ($)",
-        "Term Loan ($)",
-        "Revolver ($)",
-        "DDTL ($)",
-    ]
-    for col in num_cols:
-        if col in out.columns:
-            out[col] = pd.to_numeric(out[col], errors="coerce").fillna(0.0)
-
-    text_cols = [
-        "Deal",
-        "Est. Closing Date",
-        "New Deal or Amendment",
-        "Transaction Type",
-        "Covenant Lite",
-        "Internal Rating",
-        "S&P Rating",
-    ]
-    for col in text_cols:
-        if col in out.columns:
-            out[col] = out[col].astype(str).str.strip()
-
-    return out
-
-
-def clean_vehicles(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-
-    num_cols = [
-        "Cash ($)",
-        "Unfunded Commitments ($)",
-        "Uncalled Capital ($)",
-        "Target Hold ($)",
-        "Min EBITDA ($mm)",
-        "Min Spread (bps)",
-    ]
-    for col in num_cols:
-        if col in out.columns:
-            out[col] = pd.to_numeric(out[col], errors="coerce").fillna(0.0)
-
-    for col in ["Revolver On", "DDTL On"]:
-        if col in out.columns:
-            out[col] = out[col].fillna(False).astype(bool)
-
-    if "Vehicle" in out.columns:
-        out["Vehicle"] = out["Vehicle"].astype(str).str.strip()
-
-    return out
-
-
-def compute_availability(vdf: pd.DataFrame) -> pd.DataFrame:
-    df = vdf.copy()
-    df["Availability ($)"] = (
-        df["Cash ($)"] + df["Unfunded Commitments ($)"] + df["Uncalled Capital ($)"]
+# Keyed on a full-content fingerprint; the frame itself is passed as an
+# underscore argument so streamlit does not re-hash it.
+CACHE_MAX_ENTRIES = 32
+
+
+@st.cache_resource
+def cache_stats() -> CacheStats:
+    return CacheStats()
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _clean_deals_cached(fingerprint: str, _df):
+    cache_stats().miss("clean_deals")
+    return clean_deals(_df)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _prepare_vehicles_cached(fingerprint: str, _df):
+    cache_stats().miss("clean_vehicles + compute_availability")
+    return compute_availability(clean_vehicles(_df))
+
+
+def cached_clean_deals(df, fingerprint: str):
+    cache_stats().call("clean_deals")
+    return _clean_deals_cached(fingerprint, df)
+
+
+def cached_prepare_vehicles(df, fingerprint: str):
+    cache_stats().call("clean_vehicles + compute_availability")
+    return _prepare_vehicles_cached(fingerprint, df)
+
+
+# =======================================
+# Saved books
+# =======================================
+
+@st.cache_resource
+def allocation_store() -> AllocationStore:
+    return AllocationStore(os.environ.get("ALLOCATION_DB", "allocation.db"))
+
+
+def set_books(deals=None, vehicles=None) -> None:
+    if deals is not None:
+        st.session_state["deals_base"] = deals
+    if vehicles is not None:
+        st.session_state["vehicles_base"] = vehicles
+    st.session_state["book_version"] = st.session_state.get("book_version", 0) + 1
+
+
+def load_book(name: str) -> None:
+    store = allocation_store()
+    set_books(
+        to_dollars(store.load_deals(name)), to_dollars(store.load_vehicles(name))
     )
-    return df
 
 
-def fmt_dollars(x) -> str:
-    try:
-        if x is None or (isinstance(x, float) and math.isnan(x)):
-            x = 0.0
-        return f"${float(x):,.0f}"
-    except Exception:
-        return "$0"
+def parquet_bytes(result) -> bytes:
+    export = io.BytesIO()
+    write_frame(result.to_frame(), export, "parquet")
+    return export.getvalue()
 
 
-def fmt_percent(x) -> str:
-    try:
-        if x is None or (isinstance(x, float) and math.isnan(x)):
-            x = 0.0
-        return f"{float(x):,.2f}%"
-    except Exception:
-        return "0.00%"
+def import_files() -> None:
+    deals_file = st.session_state.get("deals_file")
+    vehicles_file = st.session_state.get("vehicles_file")
+    set_books(
+        None if deals_file is None else read_deals(deals_file),
+        None if vehicles_file is None else read_vehicles(vehicles_file),
+    )
 
 
 # =======================================
-# Allocation logic
+# Results rendering
 # =======================================
 
-if st.button("Calculate Allocations"):
-    deals = clean_deals(deals_df)
-    vdf = clean_vehicles(vehicles_df)
-    vdf = compute_availability(vdf)
+def show_table(df, *, default_format: str | None = None, **kwargs) -> None:
+    # Numbers are sent as numbers and formatted by the browser per column
+    column_config = {
+        col: st.column_config.NumberColumn(format=fmt)
+        for col, fmt in column_formats(df, default_format).items()
+    }
+    st.dataframe(
+        df, column_config=column_config, use_container_width=True, **kwargs
+    )
 
-    vehicles = vdf["Vehicle"].tolist()
 
-    # Vehicles with positive availability (for baseline checks)
-    vdf_pos = vdf[vdf["Availability ($)"] > 0].copy()
+RESULT_LAYOUTS = ["Per deal", "Compact"]
+DEAL_PAGE_SIZES = [10, 25, 50]
+# Books with more deals than this open in the compact layout
+COMPACT_DEFAULT_DEALS = 50
+# Most allocation rows sent to the browser in the compact layout
+COMPACT_MAX_ROWS = 5_000
+# Most deals offered by name in the drill-down list
+DRILL_DOWN_MAX_OPTIONS = 1_000
 
-    if vdf_pos.empty:
-        st.error(
-            "Total availability across all vehicles is zero or invalid. "
-            "Please enter positive values for Cash, Unfunded, or Uncalled Capital."
-        )
-    else:
-        # -------- Vehicle availability summary --------
-        st.subheader("Vehicle Availability Summary")
-
-        avail_display = vdf[
-            [
-                "Vehicle",
-                "Cash ($)",
-                "Unfunded Commitments ($)",
-                "Uncalled Capital ($)",
-                "Availability ($)",
-                "Target Hold ($)",
-                "Min EBITDA ($mm)",
-                "Min Spread (bps)",
-                "Revolver On",
-                "DDTL On",
-            ]
-        ].copy()
-
-        for col in [
-            "Cash ($)",
-            "Unfunded Commitments ($)",
-            "Uncalled Capital ($)",
-            "Availability ($)",
-            "Target Hold ($)",
-        ]:
-            avail_display[col] = avail_display[col].apply(fmt_dollars)
-
-        st.dataframe(avail_display, use_container_width=True)
-
-        vdf_idx = vdf.set_index("Vehicle")
-
-        # -------- Loop through deals --------
-        for idx, row in deals.iterrows():
-            deal_name = row.get("Deal", f"Deal {idx+1}") or f"Deal {idx+1}"
-
-            # Skip empty rows (no tranche sizes)
-            if (
-                (str(deal_name).strip() == "")
-                and row.get("Term Loan ($)", 0) == 0
-                and row.get("Revolver ($)", 0) == 0
-                and row.get("DDTL ($)", 0) == 0
-            ):
-                continue
-
-            st.markdown("---")
-            st.subheader(f"Deal {idx+1}: {deal_name}")
-
-            # -------- Deal summary --------
-            deal_ebitda = float(row.get("EBITDA ($mm)", 0.0) or 0.0)
-            deal_spread = float(row.get("Opening Spread (bps)", 0.0) or 0.0)
-
-            summary = pd.DataFrame(
-                [
-                    {
-                        "Deal": deal_name,
-                        "Est. Closing Date": row.get("Est. Closing Date", ""),
-                        "New Deal or Amendment": row.get("New Deal or Amendment", ""),
-                        "Transaction Type": row.get("Transaction Type", ""),
-                        "EBITDA ($mm)": f"{deal_ebitda:,.2f}",
-                        "Senior Net Leverage (x)": f"{row.get('Senior Net Leverage (x)', 0.0):,.2f}",
-                        "Total Leverage (x)": f"{row.get('Total Leverage (x)', 0.0):,.2f}",
-                        "Opening Spread (bps)": f"{deal_spread:,.0f}",
-                        "Covenant Lite": row.get("Covenant Lite", ""),
-                        "Internal Rating": row.get("Internal Rating", ""),
-                        "S&P Rating": row.get("S&P Rating", ""),
-                        "IC Approved Hold ($)": fmt_dollars(
-                            row.get("IC Approved Hold ($)", 0.0)
-                        ),
-                    }
-                ]
-            )
 
-            st.markdown("**Deal Summary**")
-            st.dataframe(summary, use_container_width=True)
+def render_results(run: dict, timings: Timings) -> None:
+    deals, vdf, result = run["deals"], run["vdf"], run["result"]
 
-            # -------- Tranche sizes (DEAL SIZE) --------
-            tl_total = float(row.get("Term Loan ($)", 0.0))
-            rev_total = float(row.get("Revolver ($)", 0.0))
-            ddtl_total = float(row.get("DDTL ($)", 0.0))
-            deal_total = tl_total + rev_total + ddtl_total
+    # -------- Vehicle availability summary --------
+    st.subheader("Vehicle Availability Summary")
+    with timings.stage("Availability table", rows=len(vdf)):
+        show_table(availability_table(vdf))
 
-            # ===== Allocation vectors, indexed by vehicle name =====
-            alloc_term = pd.Series(0.0, index=vehicles)
-            alloc_rev = pd.Series(0.0, index=vehicles)
-            alloc_ddtl = pd.Series(0.0, index=vehicles)
+    st.caption(f"Recomputed {run['recomputed']} of {len(deals)} deals.")
+    if "cancelled" in run:
+        st.warning(
+            f"Calculation was cancelled: showing the first {len(deals):,} of "
+            f"{run['cancelled']:,} deals."
+        )
 
-            # -------- Build eligibility masks based on thresholds --------
-            # Base: positive availability
-            base_mask = vdf["Availability ($)"] > 0
+    layout = st.radio(
+        "Results layout",
+        RESULT_LAYOUTS,
+        index=int(len(deals) > COMPACT_DEFAULT_DEALS),
+        horizontal=True,
+        help=(
+            "Compact shows one allocation table for the whole book and the "
+            "detailed tables of one selected deal, so the page stays light "
+            "however many deals there are."
+        ),
+    )
+    if layout == "Compact":
+        render_running_balance(result, deals, np.arange(0), timings)
+        render_compact(deals, vdf, result, timings)
+        return
+
+    # -------- One page of deals --------
+    # Everything is computed; only the current page is built and rendered
+    size_col, page_col, _ = st.columns([1, 1, 3])
+    with size_col:
+        page_size = st.selectbox("Deals per page", DEAL_PAGE_SIZES)
+    n_pages = max(1, -(-len(deals) // page_size))
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1)
+    start = (page - 1) * page_size
+    positions = np.arange(start, min(start + page_size, len(deals)))
+    st.caption(
+        f"Deals {start + 1:,}-{start + len(positions):,} of {len(deals):,} "
+        f"(page {page} of {n_pages})."
+    )
+    render_running_balance(result, deals, positions, timings)
 
-            # EBITDA threshold: if Min EBITDA is 0, ignore it
-            ebitda_ok = (vdf["Min EBITDA ($mm)"] <= 0) | (
-                vdf["Min EBITDA ($mm)"] <= deal_ebitda
-            )
+    st.subheader("Page Totals")
+    with timings.stage("Page totals", rows=len(positions)):
+        show_table(
+            page_totals_table(result, positions), default_format=DOLLAR_FORMAT
+        )
 
-            # Spread threshold: if Min Spread is 0, ignore it
-            spread_ok = (vdf["Min Spread (bps)"] <= 0) | (
-                vdf["Min Spread (bps)"] <= deal_spread
-            )
+    for pos, (idx, row) in zip(positions, deals.iloc[positions].iterrows()):
+        name = deal_name(idx, row)
+        if not is_blank_deal(name, row):
+            render_deal(result, vdf, pos, idx, row, timings)
+
+
+def render_running_balance(result, deals, positions, timings: Timings) -> None:
+    # Sequential mode only: the given deals' rows plus the final balance
+    if result.balance is None:
+        return
+    st.subheader("Running Vehicle Availability (by Est. Closing Date)")
+    with timings.stage("Running balance table", rows=len(positions) + 1):
+        show_table(
+            running_balance_table(result, deals, positions),
+            default_format=DOLLAR_FORMAT,
+            hide_index=True,
+        )
 
-            # Combined "deal-level" eligibility (before facility toggles)
-            deal_eligible_mask = base_mask & ebitda_ok & spread_ok
-
-            # ---- Term Loan: availability + thresholds ----
-            if tl_total > 0:
-                tl_elig = vdf[deal_eligible_mask].copy()
-                weights = tl_elig.set_index("Vehicle")["Availability ($)"]
-                den = float(weights.sum())
-                if den > 0:
-                    shares = weights / den  # sum(shares) = 1
-                    alloc_term = shares.reindex(vehicles).fillna(0.0) * tl_total
-
-            # ---- Revolver: availability + thresholds + Revolver On ----
-            if rev_total > 0:
-                rev_elig_mask = deal_eligible_mask & vdf["Revolver On"]
-                rev_elig = vdf[rev_elig_mask].copy()
-                weights = rev_elig.set_index("Vehicle")["Availability ($)"]
-                den = float(weights.sum())
-                if den > 0:
-                    shares = weights / den
-                    alloc_rev = shares.reindex(vehicles).fillna(0.0) * rev_total
-
-            # ---- DDTL: availability + thresholds + DDTL On ----
-            if ddtl_total > 0:
-                ddtl_elig_mask = deal_eligible_mask & vdf["DDTL On"]
-                ddtl_elig = vdf[ddtl_elig_mask].copy()
-                weights = ddtl_elig.set_index("Vehicle")["Availability ($)"]
-                den = float(weights.sum())
-                if den > 0:
-                    shares = weights / den
-                    alloc_ddtl = shares.reindex(vehicles).fillna(0.0) * ddtl_total
-
-            # -------- Allocation table: facilities x vehicles + totals row --------
-            alloc_numeric = pd.DataFrame(
-                {"Facility": ["Term Loan", "Revolver", "DDTL"]}
-            )
-            for veh in vehicles:
-                alloc_numeric[veh] = [
-                    float(alloc_term.get(veh, 0.0) or 0.0),
-                    float(alloc_rev.get(veh, 0.0) or 0.0),
-                    float(alloc_ddtl.get(veh, 0.0) or 0.0),
-                ]
-
-            # Add totals row per vehicle (TL + REV + DDTL for this deal)
-            totals_row = {"Facility": "Total"}
-            for veh in vehicles:
-                totals_row[veh] = (
-                    float(alloc_term.get(veh, 0.0) or 0.0)
-                    + float(alloc_rev.get(veh, 0.0) or 0.0)
-                    + float(alloc_ddtl.get(veh, 0.0) or 0.0)
-                )
-            alloc_numeric = pd.concat(
-                [alloc_numeric, pd.DataFrame([totals_row])],
-                ignore_index=True,
-            )
 
-            alloc_fmt = alloc_numeric.copy()
-            for veh in vehicles:
-                alloc_fmt[veh] = alloc_fmt[veh].apply(fmt_dollars)
-
-            st.markdown("**Facility Allocations (Vehicles Across Columns)**")
-            st.dataframe(alloc_fmt.set_index("Facility"), use_container_width=True)
-
-            # -------- Tranche consistency check --------
-            tl_sum = float(alloc_term.sum())
-            rev_sum = float(alloc_rev.sum())
-            ddtl_sum = float(alloc_ddtl.sum())
-
-            check_df = pd.DataFrame(
-                [
-                    {
-                        "Tranche": "Term Loan",
-                        "Tranche Size ($)": fmt_dollars(tl_total),
-                        "Sum of Allocations ($)": fmt_dollars(tl_sum),
-                        "Difference ($)": fmt_dollars(tl_sum - tl_total),
-                    },
-                    {
-                        "Tranche": "Revolver",
-                        "Tranche Size ($)": fmt_dollars(rev_total),
-                        "Sum of Allocations ($)": fmt_dollars(rev_sum),
-                        "Difference ($)": fmt_dollars(rev_sum - rev_total),
-                    },
-                    {
-                        "Tranche": "DDTL",
-                        "Tranche Size ($)": fmt_dollars(ddtl_total),
-                        "Sum of Allocations ($)": fmt_dollars(ddtl_sum),
-                        "Difference ($)": fmt_dollars(ddtl_sum - ddtl_total),
-                    },
-                    {
-                        "Tranche": "TOTAL DEAL",
-                        "Tranche Size ($)": fmt_dollars(deal_total),
-                        "Sum of Allocations ($)": fmt_dollars(tl_sum + rev_sum + ddtl_sum),
-                        "Difference ($)": fmt_dollars(
-                            (tl_sum + rev_sum + ddtl_sum) - deal_total
-                        ),
-                    },
-                ]
+def render_deal(result, vdf, pos: int, idx, row, timings: Timings) -> None:
+    # Building (formatting) and rendering the tables are timed apart
+    name = deal_name(idx, row)
+    label = f"Deal {idx+1}: {name}"
+    with timings.stage(
+        "Deal tables",
+        deal=label,
+        allocations=int(np.count_nonzero(result.alloc[pos])),
+    ) as built:
+        summary = deal_summary_table(name, row)
+        facilities = allocation_table(result, pos)
+        consistency = consistency_table(result, pos)
+        pro_rata = pro_rata_table(result, pos, vdf)
+        built.rows = sum(len(t) for t in (summary, facilities, consistency, pro_rata))
+
+    with timings.stage("Deal rendering", deal=label, rows=built.rows):
+        st.markdown("---")
+        st.subheader(label)
+
+        st.markdown("**Deal Summary**")
+        show_table(summary)
+
+        st.markdown("**Facility Allocations (Vehicles Across Columns)**")
+        show_table(facilities, default_format=DOLLAR_FORMAT)
+
+        if result.balance is not None and result.hold is None:
+            st.markdown(
+                "**Tranche Consistency Check (Unallocated = Availability Shortfall)**"
             )
+        else:
             st.markdown("**Tranche Consistency Check (Should All Be $0 Difference)**")
-            st.dataframe(check_df, use_container_width=True)
-
-            # -------- Pro-rata share by vehicle (DEAL SIZE & Target Hold) --------
-            st.markdown("**Pro-Rata Share of Deal by Vehicle (with Target Hold)**")
-
-            vehicle_total_alloc = alloc_term + alloc_rev + alloc_ddtl
-
-            pro_rata_numeric = pd.DataFrame(
-                {
-                    "Vehicle": vehicles,
-                    "Allocated_numeric": [
-                        float(vehicle_total_alloc.get(veh, 0.0) or 0.0)
-                        for veh in vehicles
-                    ],
-                    "Target_numeric": [
-                        float(vdf_idx.loc[veh, "Target Hold ($)"])
-                        if veh in vdf_idx.index
-                        else 0.0
-                        for veh in vehicles
-                    ],
-                }
+        show_table(consistency)
+
+        st.markdown("**Pro-Rata Share of Deal by Vehicle (with Target Hold)**")
+        show_table(pro_rata)
+
+
+def pick_deal(deals) -> int | None:
+    # Position of the deal to drill into: a searchable list of names for
+    # small books, a Deal # box beyond that so the options stay bounded
+    if len(deals) <= DRILL_DOWN_MAX_OPTIONS:
+        labels = [
+            f"Deal {idx+1}: {deal_name(idx, row)}" for idx, row in deals.iterrows()
+        ]
+        return st.selectbox(
+            "Drill down into a deal",
+            range(len(deals)),
+            index=None,
+            format_func=labels.__getitem__,
+        )
+    number = st.number_input(
+        "Drill down into Deal #", min_value=1, max_value=len(deals), value=None
+    )
+    return None if number is None else int(number) - 1
+
+
+def render_compact(deals, vdf, result, timings: Timings) -> None:
+    st.subheader("Allocations")
+    # Only the first rows are built and sent to the browser; the full table
+    # is in the Parquet download under Import / export files
+    with timings.stage("Compact table", rows=len(deals)) as built:
+        table = compact_table(result, vdf, max_rows=COMPACT_MAX_ROWS)
+        built.allocations = n_allocations = int(np.count_nonzero(result.alloc))
+
+    with timings.stage("Compact rendering", rows=len(table)):
+        if n_allocations > len(table):
+            st.caption(
+                f"Showing the first {len(table):,} of {n_allocations:,} "
+                "allocations; download them all under Import / export files."
             )
+        show_table(table, hide_index=True)
 
-            pro_rata_df = pd.DataFrame()
-            pro_rata_df["Vehicle"] = pro_rata_numeric["Vehicle"]
-            pro_rata_df["Allocated ($)"] = pro_rata_numeric["Allocated_numeric"].apply(
-                fmt_dollars
-            )
-            pro_rata_df["Target Hold ($)"] = pro_rata_numeric["Target_numeric"].apply(
-                fmt_dollars
+    pos = pick_deal(deals)
+    if pos is not None:
+        render_deal(result, vdf, pos, deals.index[pos], deals.iloc[pos], timings)
+
+
+# =======================================
+# Background allocation
+# =======================================
+
+# Books with at least this many deals are allocated in a worker thread
+BACKGROUND_MIN_DEALS = 5_000
+JOB_POLL_SECONDS = 0.5
+# Rows of the latest finished chunk shown while a job runs
+PARTIAL_MAX_ROWS = 1_000
+
+
+def store_run(alloc_state, fingerprint, deals, vdf, **extra) -> None:
+    st.session_state["alloc_state"] = alloc_state
+    st.session_state["last_run"] = {
+        "fingerprint": fingerprint,
+        "deals": deals,
+        "vdf": vdf,
+        "result": alloc_state.result,
+        "recomputed": int(alloc_state.recomputed.sum()),
+        **extra,
+    }
+
+
+def start_job(deals, vdf, fingerprint, options: dict) -> None:
+    pending = st.session_state.get("alloc_job")
+    if pending is not None:
+        pending["job"].cancel()
+    job = AllocationJob(deals, vdf, st.session_state.get("alloc_state"), **options)
+    st.session_state["alloc_job"] = {"job": job.start(), "fingerprint": fingerprint}
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress() -> None:
+    # Reruns on its own while the job runs; a full rerun shows the result
+    pending = st.session_state.get("alloc_job")
+    if pending is None:
+        return
+    job = pending["job"]
+
+    if job.running:
+        done = job.deals_done
+        st.progress(
+            done / max(job.n_deals, 1),
+            text=(
+                f"Allocated {done:,} of {job.n_deals:,} deals "
+                f"({job.throughput:,.0f} deals/s, {job.elapsed:,.1f}s)"
+            ),
+        )
+        st.button("Cancel", on_click=job.cancel, disabled=job.cancelled)
+        latest = job.latest()
+        if latest is not None:
+            st.markdown("**Allocated So Far by Vehicle**")
+            show_table(job.vehicle_totals(), hide_index=True)
+            first, state = latest
+            st.markdown("**Latest Finished Deals**")
+            show_table(
+                compact_table(state.result, job.vdf, first, PARTIAL_MAX_ROWS),
+                hide_index=True,
             )
+        return
+
+    del st.session_state["alloc_job"]
+    state = job.state()
+    if job.error is not None:
+        st.session_state["job_notice"] = ("error", f"Allocation failed: {job.error}")
+    elif state is None:
+        st.session_state["job_notice"] = (
+            "warning",
+            "Calculation was cancelled before any deals were allocated.",
+        )
+    elif job.complete:
+        store_run(state, pending["fingerprint"], job.deals, job.vdf)
+    else:
+        store_run(
+            state,
+            pending["fingerprint"],
+            job.deals.iloc[: job.deals_done],
+            job.vdf,
+            cancelled=job.n_deals,
+        )
+    st.rerun()
+
+
+# =======================================
+# Allocation logic
+# =======================================
+
+mode_cols = st.columns(4)
+with mode_cols[0]:
+    sequential = st.toggle(
+        "Consume availability in Est. Closing Date order",
+        help=(
+            "Deals are allocated in closing-date order and each one draws down "
+            "the availability left by earlier deals, instead of every deal seeing "
+            "each vehicle's full availability."
+        ),
+    )
+with mode_cols[1]:
+    cap_target = st.toggle(
+        "Cap vehicles at Target Hold",
+        help=(
+            "No vehicle is allocated more than its Target Hold of a deal; the "
+            "excess is redistributed pro-rata to uncapped eligible vehicles. "
+            "A Target Hold of 0 means no cap."
+        ),
+    )
+with mode_cols[2]:
+    ic_hold = st.toggle(
+        "Allocate only the IC Approved Hold",
+        help=(
+            "Each deal's IC Approved Hold is split across its tranches in "
+            "proportion to tranche size and allocated instead of the full "
+            "facility; the rest is reported as unallocated. "
+            "An IC Approved Hold of 0 means no limit."
+        ),
+    )
+
+with mode_cols[3]:
+    lot_size = st.selectbox(
+        "Round allocations to lots of",
+        [None] + LOT_SIZES,
+        format_func=lambda lot: "No rounding" if lot is None else fmt_dollars(lot),
+        help=(
+            "Largest-remainder rounding: each tranche's rounded allocations "
+            "still add up exactly to the amount allocated."
+        ),
+    )
+    cents = st.toggle(
+        "Exact cents",
+        help=(
+            "Allocate in integer cents: every tranche's allocations add up "
+            "to its size to the cent, with leftover cents going to the most "
+            "available vehicles."
+        ),
+    )
+
+alloc_options = {
+    "sequential": sequential,
+    "cap_target": cap_target,
+    "ic_hold": ic_hold,
+    "lot_size": lot_size,
+    "cents": cents,
+}
+
+# Results persist in session state across reruns, tagged with the input
+# fingerprint they were computed from, until the next Calculate click.
+input_fingerprint = (
+    frame_fingerprint(deals_df),
+    frame_fingerprint(vehicles_df),
+    tuple(alloc_options.items()),
+)
+
+calculate = st.button("Calculate Allocations")
+
+# Wall time of every stage run by this rerun, shown under Diagnostics
+timings = Timings()
+
+if calculate:
+    with timings.stage("Clean deals", rows=len(deals_df)):
+        deals = cached_clean_deals(deals_df, input_fingerprint[0])
+    with timings.stage("Clean vehicles + availability", rows=len(vehicles_df)):
+        vdf = cached_prepare_vehicles(vehicles_df, input_fingerprint[1])
 
-            if deal_total > 0:
-                pro_rata_df["Pro-Rata Share of Deal (%)"] = [
-                    fmt_percent(a / deal_total * 100.0)
-                    for a in pro_rata_numeric["Allocated_numeric"]
-                ]
-            else:
-                pro_rata_df["Pro-Rata Share of Deal (%)"] = ""
-
-            pct_of_target = []
-            for a, t in zip(
-                pro_rata_numeric["Allocated_numeric"],
-                pro_rata_numeric["Target_numeric"],
-            ):
-                t_val = float(t) if t is not None else 0.0
-                if t_val > 0:
-                    pct_of_target.append(fmt_percent(a / t_val * 100.0))
-                else:
-                    pct_of_target.append("")
-            pro_rata_df["% of Target Hold (This Deal)"] = pct_of_target
-
-            st.dataframe(pro_rata_df, use_container_width=True)
-
-else:
+    if not (vdf["Availability ($)"] > 0).any():
+        st.session_state.pop("last_run", None)
+        st.error(
+            "Total availability across all vehicles is zero or invalid. "
+            "Please enter positive values for Cash, Unfunded, or Uncalled Capital."
+        )
+    elif len(deals) >= BACKGROUND_MIN_DEALS:
+        # Large books run in a worker thread, a chunk of deals at a time
+        start_job(deals, vdf, input_fingerprint, alloc_options)
+    else:
+        # All deals x vehicles x tranches in one pass; rows unchanged since
+        # the previous run reuse its results
+        with timings.stage("Allocate", rows=len(deals)) as allocated:
+            alloc_state = allocate_incremental(
+                deals, vdf, st.session_state.get("alloc_state"), **alloc_options
+            )
+            allocated.allocations = int(
+                np.count_nonzero(alloc_state.result.alloc)
+            )
+        store_run(alloc_state, input_fingerprint, deals, vdf)
+
+if "job_notice" in st.session_state:
+    kind, message = st.session_state.pop("job_notice")
+    getattr(st, kind)(message)
+
+if "alloc_job" in st.session_state:
+    job_progress()
+
+last_run = st.session_state.get("last_run")
+if last_run is not None:
+    if last_run["fingerprint"] != input_fingerprint:
+        st.warning(
+            "The Deals or Vehicles tables or the allocation options have changed "
+            "since these results were calculated. Click **Calculate Allocations** "
+            "to refresh them."
+        )
+    with timings.stage("Render results", rows=len(last_run["deals"])):
+        render_results(last_run, timings)
+elif not calculate and "alloc_job" not in st.session_state:
     st.info(
         "Edit the Deals and Vehicles tables above, then click **Calculate Allocations** "
         "to compute pro-rata allocations by facility and vehicle, with deal-level "
         "eligibility driven by Min EBITDA and Min Spread thresholds per vehicle."
     )
+
+with st.expander("Pipeline cache"):
+    st.caption(
+        "Cleaning and availability results are reused while the table contents "
+        f"are unchanged (up to {CACHE_MAX_ENTRIES} entries per stage)."
+    )
+    st.dataframe(cache_stats().to_frame(), hide_index=True, use_container_width=True)
+
+with st.expander("Diagnostics"):
+    st.caption(
+        "Wall time of each stage in this rerun, with the rows it handled and "
+        "the non-zero allocations involved. Rendering covers serializing each "
+        "table for the browser, not the browser's own drawing time."
+    )
+    if timings.records:
+        st.metric("Total (s)", f"{timings.total_seconds():.3f}")
+        st.markdown("**By stage**")
+        st.dataframe(
+            timings.stage_totals(), hide_index=True, use_container_width=True
+        )
+        st.markdown("**By deal (slowest first)**")
+        st.dataframe(
+            timings.deal_totals(), hide_index=True, use_container_width=True
+        )
+        st.download_button(
+            "Download timings (JSON)",
+            timings.to_json(),
+            file_name="timings.json",
+            mime="application/json",
+        )
+    else:
+        st.info("Nothing was computed or rendered in this rerun.")
+
+BOOK_FILE_TYPES = ["csv", "parquet", "pq", "arrow", "feather", "ipc"]
+
+with st.expander("Import / export files"):
+    st.caption(
+        "CSV, Parquet or Arrow IPC files with the same columns as the tables "
+        "above; other columns are ignored."
+    )
+    deals_col, vehicles_col = st.columns(2)
+    with deals_col:
+        st.file_uploader("Deals file", type=BOOK_FILE_TYPES, key="deals_file")
+    with vehicles_col:
+        st.file_uploader("Vehicles file", type=BOOK_FILE_TYPES, key="vehicles_file")
+    st.button(
+        "Import files",
+        disabled=(
+            st.session_state.get("deals_file") is None
+            and st.session_state.get("vehicles_file") is None
+        ),
+        on_click=import_files,
+    )
+
+    if last_run is not None:
+        # Built only when the button is clicked, not on every rerun
+        st.download_button(
+            "Download allocations (Parquet)",
+            lambda: parquet_bytes(last_run["result"]),
+            file_name="allocations.parquet",
+            mime="application/octet-stream",
+        )
+
+with st.expander("Saved books"):
+    store = allocation_store()
+    save_col, load_col = st.columns(2)
+
+    with save_col:
+        book_name = st.text_input("Book name")
+        if st.button("Save tables", disabled=not book_name.strip()):
+            deal_book = store.save_deals(clean_deals(deals_df), book_name.strip())
+            vehicle_book = store.save_vehicles(
+                clean_vehicles(vehicles_df), book_name.strip()
+            )
+            # Results go with the book only if they match the saved tables
+            if last_run is not None and last_run["fingerprint"] == input_fingerprint:
+                store.save_run(
+                    last_run["result"],
+                    deal_book=deal_book,
+                    vehicle_book=vehicle_book,
+                    options=alloc_options,
+                )
+            st.success(f"Saved {book_name.strip()!r}.")
+
+    with load_col:
+        saved = store.books("deals")["name"].drop_duplicates().tolist()
+        chosen = st.selectbox("Saved book", saved, index=None)
+        st.button(
+            "Load tables",
+            disabled=chosen is None,
+            on_click=load_book,
+            args=(chosen,),
+        )
+
+    st.markdown("**Saved allocation runs**")
+    st.dataframe(store.runs(), hide_index=True, use_container_width=True)